@@ -1,8 +1,29 @@
-import pandas as pd
 import streamlit as st
 from PIL import Image
 import folium
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
+from streamlit_folium import st_folium
+
+from utils.data import (
+    COUNTRIES,
+    carregar_cubo_paises,
+    carregar_dados,
+    carregar_indice_culinarias,
+    carregar_indice_espacial,
+    carregar_particoes_paises,
+)
+from utils.exportacao import botao_download
+from utils.memoria import registrar_sessao
+from utils.mapa import (
+    ALTURA_MAPA,
+    AREA_INICIAL,
+    LARGURA_MAPA,
+    area_visivel,
+    camada_restaurantes,
+    chave_mapa_restaurantes,
+    linhas_visiveis,
+    mapa_html,
+)
 
 st.set_page_config(
     page_title="Home · Streamlit",
@@ -10,86 +31,39 @@ st.set_page_config(
     layout='wide'
 )
 
-# Importando o dataset
-df = pd.read_csv('dataset/zomato.csv', sep=',')
-
-# Dropando valores nulos
-df = df.dropna()
-
-# Dropando valores duplicados
-df = df.drop_duplicates()
-
-# Resetando o índex
-df = df.reset_index(drop=True)
-
-# Adicionando colunas
-COUNTRIES = {
-    1: "India",
-    14: "Australia",
-    30: "Brazil",
-    37: "Canada",
-    94: "Indonesia",
-    148: "New Zeland",
-    162: "Philippines",
-    166: "Qatar",
-    184: "Singapure",
-    189: "South Africa",
-    191: "Sri Lanka",
-    208: "Turkey",
-    214: "United Arab Emirates",
-    215: "England",
-    216: "United States of America",
-}
-df['Country Name'] = df['Country Code'].map(COUNTRIES)
-columns = df.columns.tolist()
-country_name = columns.pop(columns.index('Country Name'))
-columns.insert(3, country_name)
-df = df[columns]
-
-# Definir a função
-def create_price_type(price_range):
-    if price_range == 1:
-        return "cheap"
-    elif price_range == 2:
-        return "normal"
-    elif price_range == 3:
-        return "expensive"
-    else:
-        return "gourmet"
-
-# Aplicar a função e criar a nova coluna
-df['Cuisines Category Type'] = df['Price range'].apply(create_price_type)
-
-# Reordenar as colunas para colocar 'Cuisines Category Type' no índice 10
-columns = df.columns.tolist()
-columns.pop(columns.index('Cuisines Category Type'))  # Remove a coluna recém-criada
-columns.insert(11, 'Cuisines Category Type')  # Insere na posição 10
-df = df[columns]
+# Importando o dataset tratado (cacheado por processo)
+df = carregar_dados()
+particoes_paises = carregar_particoes_paises()
+indice_culinarias = carregar_indice_culinarias()
+cubo_paises = carregar_cubo_paises()
+indice_espacial = carregar_indice_espacial()
 
 #============================================================
 # Funções
 #============================================================
 
-def country_maps(df_filtered):
-    # Agrupar por cidade e calcular a mediana de latitude e longitude
-    df_aux = df_filtered.loc[:, ['City', 'Country Name', 'Latitude', 'Longitude']].groupby(['City', 'Country Name']).median().reset_index()
+def country_maps(selected_countries):
+    # HTML do mapa, renderizado uma vez por seleção de países e reaproveitado entre sessões
+    components.html(mapa_html(selected_countries), width=LARGURA_MAPA, height=ALTURA_MAPA + 10)
     
-    # Criar o mapa base centrado na média das coordenadas
-    map = folium.Map(location=[df_aux['Latitude'].mean(), df_aux['Longitude'].mean()], zoom_start=2)
+def restaurant_maps(selected_countries, linhas_filtradas):
+    # Só os restaurantes da área visível vão para o navegador. A área vem da última interação
+    # com o próprio mapa (valor do componente no session_state) e é consultada no índice espacial.
+    chave = chave_mapa_restaurantes(selected_countries)
+    area = area_visivel(st.session_state.get(chave)) or AREA_INICIAL
+    linhas = linhas_visiveis(indice_espacial, linhas_filtradas, area)
     
-    # Adicionar marcadores para cada cidade
-    for index, location_info in df_aux.iterrows():
-        folium.Marker(
-            [location_info['Latitude'], location_info['Longitude']],
-            popup=f"City: {location_info['City']}<br>Country: {location_info['Country Name']}"
-        ).add_to(map)
+    # O mapa base não muda entre interações; só a camada de restaurantes é trocada
+    map = folium.Map(location=[df['Latitude'].iloc[linhas_filtradas].mean(), df['Longitude'].iloc[linhas_filtradas].mean()], zoom_start=2)
+    st_folium(
+        map,
+        key=chave,
+        feature_group_to_add=camada_restaurantes(df, linhas),
+        returned_objects=['bounds', 'zoom'],
+        width=LARGURA_MAPA,
+        height=ALTURA_MAPA
+    )
     
-    # Exibir o mapa no Streamlit
-    folium_static(map, width=1024, height=600)
-    
-def download_csv(df, filename="data.csv"):
-    csv = df.to_csv(index=False)
-    return csv, filename
 #============================================================
 # Barra lateral
 #============================================================
@@ -108,21 +82,13 @@ selected_countries = st.sidebar.multiselect(
     default=sorted(COUNTRIES.values())# Padrão inicial baseado na imagem
 )
 
-# Filtrar o DataFrame com base nos países selecionados
-if selected_countries:
-    df_filtered = df[df['Country Name'].isin(selected_countries)]
-else:
-    df_filtered = df.copy()
+# Linhas dos países selecionados (posições no dataset compartilhado, sem copiar o DataFrame)
+linhas_filtradas = particoes_paises.linhas(selected_countries)
+registrar_sessao('Home', linhas_filtradas=linhas_filtradas)
 
 # Exibir mensagem na barra lateral (opcional, para feedback)
 st.sidebar.markdown('### Dados Tratados')
-csv_data, file_name = download_csv(df_filtered, filename="data.csv")
-st.sidebar.download_button(
-    label="Download",
-    data=csv_data,
-    file_name=file_name,
-    mime="text/csv"
-)
+botao_download(selected_countries, file_name="data.csv")
 
 
 #============================================================
@@ -134,28 +100,33 @@ st.subheader("Temos as seguintes marcas dentro da nossa plataforma:")
 
 with st.container():
         st.markdown("""---""")
+        totais = cubo_paises.combinar(selected_countries)
         col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
             st.markdown('###### Restaurantes Cadastrados')
-            restaurantes_cadastrados = df_filtered['Restaurant ID'].nunique()
+            restaurantes_cadastrados = df['Restaurant ID'].iloc[linhas_filtradas].nunique()
             col1.metric('', restaurantes_cadastrados,label_visibility='collapsed')
         with col2:
             st.markdown('###### Países Cadastrados')
-            paises_cadastrados = df_filtered['Country Code'].nunique()
+            paises_cadastrados = totais['Countries']
             col2.metric('', paises_cadastrados,label_visibility='collapsed')
         with col3:
             st.markdown('###### Cidades Cadastradas')
-            cidades_cadastrados = df_filtered['City'].nunique()
+            cidades_cadastrados = totais['City Count']
             col3.metric('', cidades_cadastrados,label_visibility='collapsed')
         with col4:
             st.markdown('###### Avaliações Feitas na Plataforma')
-            avaliacoes_feitas = df_filtered['Votes'].sum()
+            avaliacoes_feitas = totais['Votes']
             col4.metric('', avaliacoes_feitas,label_visibility='collapsed')
         with col5:
             st.markdown('###### Tipos de Culinária Oferecidas')
-            tipos_culinaria = df_filtered['Cuisines'].str.split(', ').explode().nunique()
+            tipos_culinaria = indice_culinarias.distintas(linhas_filtradas)
             col5.metric('', tipos_culinaria,label_visibility='collapsed')
 st.markdown("""---""")
 
 with st.container():
-    country_maps(df_filtered)
\ No newline at end of file
+    modo_mapa = st.radio('Mapa', options=['Cidades', 'Restaurantes'], horizontal=True)
+    if modo_mapa == 'Cidades':
+        country_maps(selected_countries)
+    else:
+        restaurant_maps(selected_countries, linhas_filtradas)
@@ -0,0 +1,71 @@
+# Benchmark da etapa de derivação ('Country Name' e 'Cuisines Category Type').
+# Compara o pipeline antigo (Series.apply linha a linha + duas reordenações com df[columns])
+# com os lookups vetorizados de utils.limpeza, em 1x, 10x e 100x o tamanho do dataset.
+#
+# Uso: python -m benchmarks.bench_derivacao
+import time
+
+import pandas as pd
+
+from utils.data import DATASET_PATH
+from utils.limpeza import COUNTRIES, derivar_colunas
+
+ESCALAS = [1, 10, 100]
+REPETICOES = 3
+
+#============================================================
+# Funções
+#============================================================
+
+def derivar_colunas_antigo(df):
+    def create_price_type(price_range):
+        if price_range == 1:
+            return "cheap"
+        elif price_range == 2:
+            return "normal"
+        elif price_range == 3:
+            return "expensive"
+        else:
+            return "gourmet"
+
+    df['Country Name'] = df['Country Code'].map(COUNTRIES)
+    columns = df.columns.tolist()
+    country_name = columns.pop(columns.index('Country Name'))
+    columns.insert(3, country_name)
+    df = df[columns]
+
+    df['Cuisines Category Type'] = df['Price range'].apply(create_price_type)
+    columns = df.columns.tolist()
+    columns.pop(columns.index('Cuisines Category Type'))
+    columns.insert(11, 'Cuisines Category Type')
+    return df[columns]
+
+def medir(funcao, df):
+    # Melhor de N execuções, cada uma sobre uma cópia nova (a derivação altera o frame)
+    tempos = []
+    for _ in range(REPETICOES):
+        entrada = df.copy()
+        inicio = time.perf_counter()
+        funcao(entrada)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+#============================================================
+# Execução
+#============================================================
+
+if __name__ == '__main__':
+    pd.options.mode.chained_assignment = None
+    base = pd.read_csv(DATASET_PATH, sep=',').dropna().drop_duplicates().reset_index(drop=True)
+
+    print(f"{'escala':>6} {'linhas':>9} {'antigo (ms)':>12} {'vetorizado (ms)':>16} {'ns/linha':>9} {'speedup':>8}")
+    referencia = None
+    for escala in ESCALAS:
+        df = pd.concat([base] * escala, ignore_index=True)
+        antigo = medir(derivar_colunas_antigo, df)
+        novo = medir(derivar_colunas, df)
+        por_linha = novo / len(df) * 1e9
+        referencia = referencia or por_linha
+        print(f"{escala:>5}x {len(df):>9} {antigo * 1e3:>12.1f} {novo * 1e3:>16.2f} "
+              f"{por_linha:>9.1f} {antigo / novo:>7.0f}x")
+    print(f"custo por linha em {ESCALAS[-1]}x: {por_linha / referencia:.2f}x o custo por linha em 1x")
@@ -0,0 +1,76 @@
+# Benchmark da consulta dos k mais próximos (IndiceGrade.vizinhos) com ~1 milhão de restaurantes.
+# Compara a busca antiga (refaz a consulta por raio inteira a cada vez que o raio dobra) com a
+# expansão incremental de utils.espacial, de pontos com vizinhos perto e longe, com e sem filtros.
+#
+# Uso: python -m benchmarks.bench_vizinhos
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.culinarias import IndiceCulinarias
+from utils.data import DATASET_PATH
+from utils.espacial import RAIO_TERRA_KM, IndiceGrade, filtro_restaurantes
+from utils.limpeza import tratar_dados
+
+RESTAURANTES = 1_000_000
+K = 10
+REPETICOES = 5
+
+PONTOS = {
+    'Nova Delhi': (28.61, 77.21),
+    'São Paulo': (-23.55, -46.63),
+    'Pacífico Sul': (-40.0, -120.0),
+}
+
+#============================================================
+# Funções
+#============================================================
+
+def vizinhos_antigo(indice, latitude, longitude, k, filtro=None, km_inicial=1.0):
+    km = km_inicial
+    while True:
+        linhas, distancias = indice.raio(latitude, longitude, km, filtro)
+        if len(linhas) >= k or km >= np.pi * RAIO_TERRA_KM:
+            return linhas[:k], distancias[:k]
+        km *= 2
+
+def replicar(df, n):
+    # O dataset repetido até n linhas, com as coordenadas espalhadas em ~2 km para não empilhar
+    rng = np.random.default_rng(0)
+    df = pd.concat([df] * (n // len(df) + 1), ignore_index=True).iloc[:n]
+    for coluna in ('Latitude', 'Longitude'):
+        df[coluna] = df[coluna].astype(np.float64) + rng.normal(0, 0.02, n)
+    return df
+
+def medir(funcao, *args):
+    # Melhor de N execuções
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+#============================================================
+# Execução
+#============================================================
+
+if __name__ == '__main__':
+    df = replicar(tratar_dados(pd.read_csv(DATASET_PATH, sep=',')), RESTAURANTES)
+    indice = IndiceGrade(df['Latitude'], df['Longitude'])
+    indice_culinarias = IndiceCulinarias(df['Cuisines'])
+    filtros = {
+        'sem filtro': None,
+        'nota >= 4.5': filtro_restaurantes(df, indice_culinarias, nota_minima=4.5),
+        'Mineira': filtro_restaurantes(df, indice_culinarias, culinarias=['Mineira']),
+        'só Brasil': filtro_restaurantes(df, indice_culinarias, selecionadas=(df['Country Name'] == 'Brazil').to_numpy()),
+    }
+
+    print(f"{'ponto':<14} {'filtro':<12} {'k-ésimo (km)':>13} {'antigo (ms)':>12} {'incremental (ms)':>17}")
+    for ponto, (latitude, longitude) in PONTOS.items():
+        for nome, filtro in filtros.items():
+            _, distancias = indice.vizinhos(latitude, longitude, K, filtro)
+            antigo = medir(vizinhos_antigo, indice, latitude, longitude, K, filtro)
+            novo = medir(indice.vizinhos, latitude, longitude, K, filtro)
+            print(f"{ponto:<14} {nome:<12} {distancias[-1]:>13.1f} {antigo * 1e3:>12.2f} {novo * 1e3:>17.2f}")
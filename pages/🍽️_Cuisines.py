@@ -1,89 +1,42 @@
-import pandas as pd
+import numpy as np
 import streamlit as st
 from PIL import Image
 import plotly.express as px
 
+from utils.agregados import selecionar_top
+from utils.culinarias import MODO_E, MODO_OU
+from utils.data import COUNTRIES, carregar_cubo_culinarias, carregar_dados, carregar_indice_culinarias, carregar_particoes_paises, carregar_ranking_restaurantes
+from utils.exportacao import botao_download
+from utils.memoria import registrar_sessao
+from utils.ranking import AGRUPAR_REDE, AGRUPAR_RESTAURANTE
+from utils.graficos import assinatura_grafico, grafico
+
 st.set_page_config(
     page_title='Cuisines · Streamlit', 
     page_icon='📈', 
     layout='wide')
 
-# Importando o dataset
-df = pd.read_csv('dataset/zomato.csv', sep=',')
-
-# Dropando valores nulos
-df = df.dropna()
-
-# Dropando valores duplicados
-df = df.drop_duplicates()
-
-# Resetando o índex
-df = df.reset_index(drop=True)
-
-# Adicionando colunas
-COUNTRIES = {
-    1: "India",
-    14: "Australia",
-    30: "Brazil",
-    37: "Canada",
-    94: "Indonesia",
-    148: "New Zeland",
-    162: "Philippines",
-    166: "Qatar",
-    184: "Singapure",
-    189: "South Africa",
-    191: "Sri Lanka",
-    208: "Turkey",
-    214: "United Arab Emirates",
-    215: "England",
-    216: "United States of America",
-}
-df['Country Name'] = df['Country Code'].map(COUNTRIES)
-columns = df.columns.tolist()
-country_name = columns.pop(columns.index('Country Name'))
-columns.insert(3, country_name)
-df = df[columns]
-
-# Definir a função
-def create_price_type(price_range):
-    if price_range == 1:
-        return "cheap"
-    elif price_range == 2:
-        return "normal"
-    elif price_range == 3:
-        return "expensive"
-    else:
-        return "gourmet"
-
-# Aplicar a função e criar a nova coluna
-df['Cuisines Category Type'] = df['Price range'].apply(create_price_type)
-
-# Reordenar as colunas para colocar 'Cuisines Category Type' no índice 10
-columns = df.columns.tolist()
-columns.pop(columns.index('Cuisines Category Type'))  # Remove a coluna recém-criada
-columns.insert(11, 'Cuisines Category Type')  # Insere na posição 10
-df = df[columns]
+# Importando o dataset tratado (cacheado por processo)
+df = carregar_dados()
+particoes_paises = carregar_particoes_paises()
+indice_culinarias = carregar_indice_culinarias()
+ranking_restaurantes = carregar_ranking_restaurantes()
+cubo_culinarias = carregar_cubo_culinarias()
 
 #============================================================
 # Funções
 #============================================================
-def top_tipos_culinarios(x):
-    df_aux = df_filtered['Cuisines'].str.split(', ').explode().reset_index()
-    df_aux = (
-        df_aux.groupby('Cuisines')
-        .size()
-        .reset_index(name='Counts')
-        .sort_values(by='Counts', ascending=False)
-        .head(x)
-    )
-    return df_aux['Cuisines'].tolist()  # <-- retorna lista de strings
+def medias_culinarias():
+    # Só com filtro de países, a média por culinária sai do cubo (país, culinária);
+    # com filtro de tipos culinários, das linhas filtradas via índice de culinárias
+    if selected_cuisines:
+        return indice_culinarias.medias(df['Aggregate rating'], linhas_filtradas)
+    return cubo_culinarias.medias('Aggregate rating', selected_countries)
 
 def top10_culinarias(x):
-    df_exploded = df_filtered['Cuisines'].str.split(', ').explode()
-    df_exploded_with_rating = df_exploded.to_frame().merge(df_filtered['Aggregate rating'], left_index=True, right_index=True)
-    df_aux = df_exploded_with_rating.groupby('Cuisines')['Aggregate rating'].mean().reset_index()
+    df_aux = medias_culinarias().reset_index(name='Aggregate rating')
     ascending_value = False if x.lower() == 'melhores' else True if x.lower() == 'piores' else False
-    df_aux = df_aux.sort_values(by='Aggregate rating', ascending=ascending_value).head(10).round(2)
+    df_aux = df_aux.iloc[selecionar_top(df_aux['Aggregate rating'], 10, ascending_value)].round(2)
 
     fig = px.bar(df_aux, x='Cuisines', y='Aggregate rating',
                  title=f'Top 10 Tipos de Culinária por Média de Notas ({x})',
@@ -97,11 +50,8 @@ def top10_culinarias(x):
         margin=dict(t=50, b=50)
     )
     fig.update_traces(textposition='auto')
-    st.plotly_chart(fig, use_container_width=True, key=f"top_10_cuisines_chart_{x}")
+    return fig
 
-def download_csv(df, filename="data.csv"):
-    csv = df.to_csv(index=False)
-    return csv, filename
 #============================================================
 # Barra lateral
 #============================================================
@@ -120,25 +70,11 @@ selected_countries = st.sidebar.multiselect(
     default=sorted(COUNTRIES.values())# Padrão inicial baseado na imagem
 )
 
-# Filtrar o DataFrame com base nos países selecionados
-if selected_countries:
-    df_filtered = df[df['Country Name'].isin(selected_countries)]
-else:
-    df_filtered = df.copy()
 
 # Exibir mensagem na barra lateral (opcional, para feedback)
 st.sidebar.markdown('### Dados Tratados')
-csv_data, file_name = download_csv(df_filtered, filename="data.csv")
-st.sidebar.download_button(
-    label="Download",
-    data=csv_data,
-    file_name=file_name,
-    mime="text/csv"
-)
+botao_download(selected_countries, file_name="data.csv")
 
-# Exemplo de uso (descomente para testar)
-# top10_culinarias('melhores')  # Para os melhores
-# top10_culinarias('piores')    # Para os piores
 #============================================================
 #  Layout no Streamlit
 #============================================================
@@ -147,55 +83,50 @@ st.markdown("""---""")
 #CONTAINER 1
 with st.container():
     st.header("Melhores restaurantes dos principais tipos culinários")
+    # Opções e padrão (5 mais frequentes) do catálogo da seleção de países, somado por país
+    opcoes_culinarias, mais_frequentes = cubo_culinarias.catalogo(selected_countries, 5)
     selected_cuisines = st.multiselect(
     'Escolha os tipos culinários que deseja visualizar',
-    options=sorted(df_filtered['Cuisines'].str.split(', ').explode().unique()),
-    default=sorted(top_tipos_culinarios(5))
+    options=opcoes_culinarias,
+    default=sorted(mais_frequentes)
 )
+    modo_culinarias = st.radio(
+        'Combinar os tipos culinários escolhidos',
+        options=[MODO_OU, MODO_E],
+        format_func={MODO_OU: 'Qualquer um', MODO_E: 'Todos'}.get,
+        horizontal=True
+    )
 
-    # Filtro por países
-    if selected_countries:
-        df_filtered = df[df['Country Name'].isin(selected_countries)]
-    else:
-        df_filtered = df.copy()
-    
-    # Filtro por tipos culinários
+    # Filtro por países (posições no dataset compartilhado, sem copiar o DataFrame)
+    linhas_filtradas = particoes_paises.linhas(selected_countries)
+
+    # Filtro por tipos culinários (nome exato, via bitmaps do índice de culinárias)
     if selected_cuisines:
-        df_filtered = df_filtered[
-            df_filtered['Cuisines'].apply(
-                lambda x: any(cuisine in x for cuisine in selected_cuisines)
-            )
-        ]
-    # Top 10 restaurantes combinando nota média e quantidade de avaliações
-    # Agrupar por 'Restaurant Name' e agregar as métricas e colunas adicionais
-    df_rest = (
-        df_filtered.groupby("Restaurant Name")
-        .agg(
-            Nota_Media=("Aggregate rating", "mean"),
-            Total_Avaliacoes=("Aggregate rating", "count"),
-            Country_Name=("Country Name", "first"),    # Pega o primeiro 'Country Name'
-            City=("City", "first"),                   # Pega o primeiro 'City'
-            Cuisines=("Cuisines", "first")            # Pega o primeiro 'Cuisines'
-        )
-        .reset_index()
+        linhas_filtradas = np.flatnonzero(indice_culinarias.filtrar(selected_cuisines, modo_culinarias, linhas_filtradas))
+    registrar_sessao('Cuisines', linhas_filtradas=linhas_filtradas)
+
+    # Top 10 pela nota ponderada pelos votos (ranking pré-calculado, sem agrupar e ordenar tudo)
+    agrupar_por = st.radio(
+        'Ranking por',
+        options=[AGRUPAR_RESTAURANTE, AGRUPAR_REDE],
+        format_func={AGRUPAR_RESTAURANTE: 'Restaurante', AGRUPAR_REDE: 'Rede (mesmo nome)'}.get,
+        horizontal=True
     )
-    
-    # Filtra só restaurantes com pelo menos 10 avaliações
-    df_rest = df_rest[df_rest["Total_Avaliacoes"] >= 10]
-    
-    # Ordena pelos melhores
-    df_rest = df_rest.sort_values(
-        by=["Nota_Media", "Total_Avaliacoes"],
-        ascending=[False, False]
-    ).head(10)
+    if agrupar_por == AGRUPAR_REDE:
+        df_rest = ranking_restaurantes.tabela_redes(df, 10, linhas_filtradas)
+    else:
+        df_rest = ranking_restaurantes.tabela_restaurantes(df, 10, linhas_filtradas, selected_cuisines)
     
     # Exibir o resultado no Streamlit
-    st.subheader("Top 10 Restaurantes (10 avaliações mínimo)")
+    st.subheader("Top 10 Restaurantes (nota ponderada pelos votos)")
     st.dataframe(df_rest)
 
+# Gráficos cacheados por (key do gráfico, filtro de países e de tipos culinários)
+assinatura = assinatura_grafico(selected_countries, tuple(sorted(selected_cuisines)), modo_culinarias)
+
 with st.container():
     col1, col2 = st.columns(2)
     with col1:
-        top10_culinarias('melhores')
+        grafico("top_10_cuisines_chart_melhores", assinatura, lambda: top10_culinarias('melhores'))
     with col2: 
-        top10_culinarias('piores')  
\ No newline at end of file
+        grafico("top_10_cuisines_chart_piores", assinatura, lambda: top10_culinarias('piores'))  
\ No newline at end of file
@@ -0,0 +1,60 @@
+import streamlit as st
+from PIL import Image
+
+from utils.data import carregar_dados
+from utils.memoria import registrar_sessao, tabela_colunas, tabela_sessoes
+
+st.set_page_config(
+    page_title='Memory · Streamlit',
+    page_icon='💾',
+    layout='wide'
+)
+
+# Importando o dataset tratado (o mesmo objeto para todas as sessões)
+df = carregar_dados()
+registrar_sessao('Memory')
+
+MB = 1024 * 1024
+
+#============================================================
+# Barra lateral
+#============================================================
+image_path = ('logo.png')
+image = Image.open( image_path )
+st.sidebar.image(image, width=80)
+st.sidebar.markdown('## Gourmet Quest')
+st.sidebar.markdown("""---""")
+
+#============================================================
+#  Layout no Streamlit
+#============================================================
+st.title("💾 Memória")
+st.markdown("""---""")
+
+colunas = tabela_colunas(df)
+sessoes = tabela_sessoes()
+media_sessao = sessoes['Total (bytes)'].mean() if len(sessoes) else 0
+
+with st.container():
+    col1, col2, col3 = st.columns(3)
+    col1.metric('Dataset compartilhado (MB)', f"{colunas['Bytes'].sum() / MB:.2f}")
+    col2.metric('Sessões ativas (30 min)', len(sessoes))
+    col3.metric('Média por sessão (MB)', f'{media_sessao / MB:.2f}')
+
+st.markdown("""---""")
+
+# Bytes de cada coluna do dataset tratado
+with st.container():
+    st.subheader('Bytes por Coluna')
+    st.dataframe(colunas, hide_index=True, use_container_width=True)
+
+st.markdown("""---""")
+
+# Memória que o último rerun de cada sessão segurou além do que é compartilhado pelo processo
+with st.container():
+    st.subheader('Bytes por Sessão')
+    st.dataframe(sessoes, hide_index=True, use_container_width=True)
+
+    # Estimativa para dimensionar o container
+    usuarios = st.number_input('Sessões simultâneas', min_value=1, value=max(len(sessoes), 1), step=1)
+    st.metric('Memória estimada dos dados (MB)', f"{(colunas['Bytes'].sum() + usuarios * media_sessao) / MB:.2f}")
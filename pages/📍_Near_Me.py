@@ -0,0 +1,120 @@
+import time
+
+import numpy as np
+import streamlit as st
+from PIL import Image
+
+from utils.culinarias import MODO_E, MODO_OU
+from utils.data import (
+    COUNTRIES,
+    carregar_dados,
+    carregar_indice_culinarias,
+    carregar_indice_espacial,
+    carregar_particoes_paises,
+)
+from utils.espacial import filtro_restaurantes
+from utils.exportacao import botao_download
+from utils.memoria import registrar_sessao
+from utils.limpeza import PRICE_TYPES
+
+st.set_page_config(
+    page_title='Near Me · Streamlit', 
+    page_icon='📍', 
+    layout='wide'
+)
+
+# Importando o dataset tratado (cacheado por processo)
+df = carregar_dados()
+particoes_paises = carregar_particoes_paises()
+indice_culinarias = carregar_indice_culinarias()
+indice_espacial = carregar_indice_espacial()
+
+#============================================================
+# Barra lateral
+#============================================================
+image_path = ('logo.png')
+image = Image.open( image_path )
+st.sidebar.image(image, width=80)
+st.sidebar.markdown('## Gourmet Quest')
+st.sidebar.markdown("""---""")
+st.sidebar.markdown('## Filtros')
+
+
+# Adicionar checkboxes para os países
+selected_countries = st.sidebar.multiselect(
+    'Escolha os Países que Deseja visualizar as Informações',
+    options=sorted(COUNTRIES.values()),  # Lista de países ordenada
+    default=sorted(COUNTRIES.values())# Padrão inicial baseado na imagem
+)
+
+# Linhas dos países selecionados (posições no dataset compartilhado, sem copiar o DataFrame)
+linhas_filtradas = particoes_paises.linhas(selected_countries)
+registrar_sessao('Near Me', linhas_filtradas=linhas_filtradas)
+
+# Exibir mensagem na barra lateral (opcional, para feedback)
+st.sidebar.markdown('### Dados Tratados')
+botao_download(selected_countries, file_name="data.csv")
+
+#============================================================
+#  Layout no Streamlit
+#============================================================
+st.title("📍 Restaurantes Próximos")
+st.markdown("""---""")
+
+# PONTO DE REFERÊNCIA
+with st.container():
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        cidades = df[['City', 'Latitude', 'Longitude']].iloc[linhas_filtradas].groupby('City', observed=True).median()
+        cidade = st.selectbox('Cidade de referência', options=cidades.index.tolist())
+    with col2:
+        latitude = st.number_input('Latitude', min_value=-90.0, max_value=90.0,
+                                   value=float(cidades.loc[cidade, 'Latitude']), format='%.5f', key=f'latitude_{cidade}')
+    with col3:
+        longitude = st.number_input('Longitude', min_value=-180.0, max_value=180.0,
+                                    value=float(cidades.loc[cidade, 'Longitude']), format='%.5f', key=f'longitude_{cidade}')
+
+# TIPO DE CONSULTA E FILTROS
+with st.container():
+    col1, col2 = st.columns(2)
+    with col1:
+        tipo_consulta = st.radio('Buscar', options=['Mais próximos', 'Dentro de um raio'], horizontal=True)
+        if tipo_consulta == 'Mais próximos':
+            k = st.slider('Quantidade de restaurantes', min_value=1, max_value=100, value=10)
+        else:
+            km = st.slider('Raio (km)', min_value=0.5, max_value=50.0, value=5.0, step=0.5)
+        nota_minima = st.slider('Nota mínima', min_value=0.0, max_value=5.0, value=0.0, step=0.1)
+    with col2:
+        culinarias = st.multiselect('Tipos culinários', options=indice_culinarias.frequencias(linhas_filtradas).index.tolist())
+        modo_culinarias = st.radio(
+            'Combinar os tipos culinários escolhidos',
+            options=[MODO_OU, MODO_E],
+            format_func={MODO_OU: 'Qualquer um', MODO_E: 'Todos'}.get,
+            horizontal=True
+        )
+        tipos_preco = st.multiselect('Faixa de preço', options=PRICE_TYPES)
+
+# Seleção de países como máscara sobre todas as linhas (o filtro só olha as linhas candidatas)
+selecionadas = np.zeros(len(df), dtype=bool)
+selecionadas[linhas_filtradas] = True
+filtro = filtro_restaurantes(df, indice_culinarias, selecionadas, culinarias, modo_culinarias, tipos_preco, nota_minima)
+
+inicio = time.perf_counter()
+if tipo_consulta == 'Mais próximos':
+    linhas, distancias = indice_espacial.vizinhos(latitude, longitude, k, filtro)
+else:
+    linhas, distancias = indice_espacial.raio(latitude, longitude, km, filtro)
+tempo_consulta = time.perf_counter() - inicio
+
+st.markdown("""---""")
+
+# RESULTADO
+with st.container():
+    df_aux = df.iloc[linhas][['Restaurant Name', 'Country Name', 'City', 'Cuisines', 'Cuisines Category Type',
+                              'Aggregate rating', 'Votes', 'Latitude', 'Longitude']]
+    df_aux.insert(0, 'Distance (km)', distancias.round(2))
+    st.subheader(f"{len(df_aux)} restaurantes encontrados")
+    st.caption(f"Consulta em {tempo_consulta * 1000:.1f} ms")
+    # O st.map não serializa float32 (tipo das coordenadas no dataset); o resultado tem poucas linhas
+    st.map(df_aux.astype({'Latitude': 'float64', 'Longitude': 'float64'}), latitude='Latitude', longitude='Longitude')
+    st.dataframe(df_aux.drop(columns=['Latitude', 'Longitude']), hide_index=True)
@@ -0,0 +1,12 @@
+import shutil
+
+import pytest
+
+from utils.data import DATASET_PATH
+
+@pytest.fixture
+def csv_path(tmp_path):
+    # Cópia do dataset em uma pasta temporária: o snapshot e os deltas são gerados ao lado dela
+    destino = tmp_path / 'zomato.csv'
+    shutil.copyfile(DATASET_PATH, destino)
+    return str(destino)
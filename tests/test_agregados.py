@@ -0,0 +1,34 @@
+# Estatísticas por cidade (utils.agregados.estatisticas_cidades) comparadas com os groupby por
+# 'City' que a página Cities fazia antes.
+#
+# Uso: python -m pytest tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.agregados import CulinariasCidades, estatisticas_cidades
+from utils.culinarias import IndiceCulinarias
+from utils.data import DATASET_PATH
+from utils.limpeza import tipar_colunas, tratar_dados
+
+#============================================================
+# Testes
+#============================================================
+
+@pytest.mark.parametrize('paises', [[], ['Brazil', 'India']])
+def test_estatisticas_cidades_igual_groupby(paises):
+    df = tipar_colunas(tratar_dados(pd.read_csv(DATASET_PATH, sep=',')))
+    culinarias_cidades = CulinariasCidades(df, IndiceCulinarias(df['Cuisines']))
+    linhas = np.flatnonzero(df['Country Name'].isin(paises).to_numpy()) if paises else None
+
+    tabela = estatisticas_cidades(df, culinarias_cidades.distintas(paises), linhas)
+    filtrado = df if linhas is None else df.iloc[linhas]
+    esperado = filtrado.groupby('City', observed=True).agg(
+        contagem=('Restaurant ID', 'count'), nota=('Aggregate rating', 'mean'),
+    )
+    explodidas = filtrado[['City', 'Cuisines']].assign(Cuisines=filtrado['Cuisines'].str.split(', ')).explode('Cuisines')
+    distintas = explodidas.groupby('City', observed=True)['Cuisines'].nunique()
+    assert tabela['City'].tolist() == esperado.index.tolist()
+    np.testing.assert_array_equal(tabela['Restaurant ID'], esperado['contagem'])
+    np.testing.assert_allclose(tabela['Aggregate rating'], esperado['nota'], rtol=1e-12)
+    np.testing.assert_array_equal(tabela['Unique Cuisine Count'], distintas.reindex(esperado.index))
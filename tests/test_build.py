@@ -0,0 +1,65 @@
+# Build em um pool de processos (utils.build.construir): o snapshot e os agregados juntados das
+# partições por país são iguais aos construídos no processo atual sobre o dataset inteiro.
+#
+# Uso: python -m pytest tests
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import pytest
+
+from utils.agregados import CuboCulinarias, CuboPaises, CulinariasCidades
+from utils.build import construir, ler_agregados
+from utils.culinarias import IndiceCulinarias
+from utils.ingestao import aplicar_deltas, digest_versao, ler_delta
+from utils.limpeza import tipar_colunas, tratar_dados
+from utils.snapshot import caminho_snapshot, para_pandas
+
+#============================================================
+# Funções
+#============================================================
+
+def escrever_delta(tmp_path, csv_path):
+    # Um restaurante alterado para uma culinária que não existe no CSV (entra no vocabulário)
+    bruto = pd.read_csv(csv_path, sep=',').dropna()
+    delta = bruto.iloc[[0]].assign(Cuisines='Quitute, Pizza')
+    path = str(tmp_path / 'delta.csv')
+    delta.to_csv(path, index=False)
+    return [(path, 'delta')]
+
+#============================================================
+# Testes
+#============================================================
+
+@pytest.mark.parametrize('processos', [1, 2])
+@pytest.mark.parametrize('com_delta', [False, True])
+def test_build_igual_processo_unico(csv_path, tmp_path, processos, com_delta):
+    deltas = escrever_delta(tmp_path, csv_path) if com_delta else []
+    tempos = construir(csv_path, 'csv', deltas, processos=processos)
+    assert [nome for nome, _ in tempos][-1] == 'junção dos agregados'
+
+    df = para_pandas(feather.read_table(caminho_snapshot(csv_path)))
+    esperado, _, _ = aplicar_deltas(tipar_colunas(tratar_dados(pd.read_csv(csv_path, sep=','))), [ler_delta(path) for path, _ in deltas])
+    pd.testing.assert_frame_equal(df, esperado)
+
+    agregados = ler_agregados(csv_path, digest_versao('csv', [digest for _, digest in deltas]))
+    indice = IndiceCulinarias(df['Cuisines'])
+
+    cubo, esperado = agregados['cubo_paises'], CuboPaises(df)
+    assert list(cubo.paises) == list(esperado.paises)
+    for nome in ('contagem', 'soma_votos', 'cidades'):
+        np.testing.assert_array_equal(getattr(cubo, nome), getattr(esperado, nome))
+    for nome in ('soma_nota', 'soma_custo'):
+        np.testing.assert_allclose(getattr(cubo, nome), getattr(esperado, nome))
+
+    cubo, esperado = agregados['cubo_culinarias'], CuboCulinarias(df, indice)
+    np.testing.assert_array_equal(cubo.culinarias, esperado.culinarias)
+    assert ('Quitute' in cubo.culinarias) == com_delta
+    np.testing.assert_array_equal(cubo.contagem, esperado.contagem)
+    for coluna, soma in esperado.somas.items():
+        np.testing.assert_allclose(cubo.somas[coluna], soma)
+
+    culinarias_cidades, esperado = agregados['culinarias_cidades'], CulinariasCidades(df, indice)
+    np.testing.assert_array_equal(culinarias_cidades.pares, esperado.pares)
+    np.testing.assert_array_equal(culinarias_cidades.vocabulario, esperado.vocabulario)
+    np.testing.assert_array_equal(culinarias_cidades.culinarias, esperado.culinarias)
+    np.testing.assert_array_equal(culinarias_cidades.distintas(['India']), esperado.distintas(['India']))
@@ -0,0 +1,60 @@
+# Filtro de culinárias (utils.culinarias.IndiceCulinarias): nome exato, modos OU/E e a mesma
+# resposta em filtrar() e contem(), comparados com o filtro linha a linha sobre 'Cuisines'.
+#
+# Uso: python -m pytest tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.culinarias import MODO_E, MODO_OU, IndiceCulinarias
+from utils.data import DATASET_PATH
+from utils.limpeza import tratar_dados
+
+#============================================================
+# Funções
+#============================================================
+
+def referencia(cuisines, culinarias, modo):
+    # Filtro linha a linha, pelo nome exato de cada culinária do restaurante
+    combinar = all if modo == MODO_E else any
+    return np.array([combinar(nome in linha.split(', ') for nome in culinarias) for linha in cuisines])
+
+@pytest.fixture(scope='module')
+def cuisines():
+    return tratar_dados(pd.read_csv(DATASET_PATH, sep=','))['Cuisines']
+
+#============================================================
+# Testes
+#============================================================
+
+def test_nome_exato():
+    # 'Bar' não casa com 'Bar Food' (o filtro antigo, por substring, casava)
+    cuisines = pd.Series(['Bar Food', 'Bar, Pizza', 'Pizza', 'Bar Food, Bar', 'Sushi Bar'])
+    indice = IndiceCulinarias(cuisines)
+    np.testing.assert_array_equal(indice.filtrar(['Bar']), [False, True, False, True, False])
+    np.testing.assert_array_equal(indice.filtrar(['Bar', 'Pizza'], MODO_E), [False, True, False, False, False])
+    np.testing.assert_array_equal(indice.filtrar(['Bar Food', 'Pizza']), [True, True, True, True, False])
+    # Uma culinária inexistente não casa com nada; no modo E, nenhum restaurante tem todas
+    assert not indice.filtrar(['Ba']).any()
+    assert not indice.filtrar(['Bar', 'Ba'], MODO_E).any()
+    np.testing.assert_array_equal(indice.filtrar(['Bar', 'Ba']), indice.filtrar(['Bar']))
+
+@pytest.mark.parametrize('modo', [MODO_OU, MODO_E])
+def test_filtrar_igual_referencia(cuisines, modo):
+    indice = IndiceCulinarias(cuisines)
+    rng = np.random.default_rng(0)
+    linhas = np.flatnonzero(rng.random(len(cuisines)) < 0.5)
+    # Sorteadas do vocabulário e as de restaurantes com várias culinárias (para o modo E casar algo)
+    varias = np.flatnonzero(cuisines.str.count(', ').to_numpy() >= 2)
+    selecoes = [list(rng.choice(indice.vocabulario, n, replace=False)) for n in (1, 2, 3, 20)]
+    selecoes += [cuisines.iloc[i].split(', ')[:n] for i, n in zip(rng.choice(varias, 3), (2, 3, 3))]
+    for culinarias in selecoes:
+        esperado = referencia(cuisines, culinarias, modo)
+        np.testing.assert_array_equal(indice.filtrar(culinarias, modo), esperado)
+
+        # Restrito a um subconjunto de linhas, por posições ou por máscara
+        restrito = np.zeros(len(cuisines), dtype=bool)
+        restrito[linhas] = esperado[linhas]
+        np.testing.assert_array_equal(indice.filtrar(culinarias, modo, linhas), restrito)
+        np.testing.assert_array_equal(indice.filtrar(culinarias, modo, restrito | ~esperado), restrito)
+        np.testing.assert_array_equal(indice.contem(culinarias, linhas, modo), esperado[linhas])
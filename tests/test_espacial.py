@@ -0,0 +1,83 @@
+# Índice espacial em grade (utils.espacial.IndiceGrade): retângulo, raio e k mais próximos
+# comparados com a busca exaustiva em todos os pontos, inclusive perto dos polos e do antimeridiano.
+#
+# Uso: python -m pytest tests
+import numpy as np
+import pytest
+
+from utils.espacial import IndiceGrade, haversine
+
+# Pontos de consulta nas bordas: polos, antimeridiano (dos dois lados) e um ponto em -180
+BORDAS = [(89.99, 0.0), (-89.99, 179.9), (0.0, 179.999), (0.0, -180.0), (-17.7, 178.4), (-17.7, -179.5)]
+
+#============================================================
+# Funções
+#============================================================
+
+def pontos(n=20_000, semente=0):
+    # Metade espalhada pelo globo e metade em aglomerados, alguns nos polos e no antimeridiano
+    rng = np.random.default_rng(semente)
+    latitude = np.degrees(np.arcsin(rng.uniform(-1, 1, n // 2)))
+    longitude = rng.uniform(-180, 180, n // 2)
+    centros = np.array([(28.6, 77.2), (-23.5, -46.6), (-17.7, 179.9), (-17.7, -179.9), (89.5, 10.0), (-89.5, -120.0)])
+    centro = centros[rng.integers(len(centros), size=n - n // 2)]
+    latitude = np.clip(np.r_[latitude, centro[:, 0] + rng.normal(0, 0.3, len(centro))], -90, 90)
+    longitude = np.r_[longitude, centro[:, 1] + rng.normal(0, 0.3, len(centro))]
+    return latitude, (longitude + 180) % 360 - 180
+
+def consultas(latitude, longitude, n, semente=1):
+    # Pontos aleatórios e pontos em cima de restaurantes, mais os das bordas
+    rng = np.random.default_rng(semente)
+    escolhidos = rng.integers(len(latitude), size=n)
+    aleatorios = zip(rng.uniform(-89, 89, n), rng.uniform(-180, 180, n))
+    return list(aleatorios) + list(zip(latitude[escolhidos], longitude[escolhidos])) + BORDAS
+
+@pytest.fixture(scope='module')
+def indice():
+    latitude, longitude = pontos()
+    return IndiceGrade(latitude, longitude), latitude, longitude
+
+#============================================================
+# Testes
+#============================================================
+
+def test_consultar(indice):
+    indice, latitude, longitude = indice
+    rng = np.random.default_rng(2)
+    for _ in range(200):
+        sul, norte = np.sort(rng.uniform(-90, 90, 2))
+        oeste, leste = rng.uniform(-180, 180, 2)
+        dentro_lon = (longitude >= oeste) & (longitude <= leste) if oeste <= leste else (longitude >= oeste) | (longitude <= leste)
+        esperado = np.flatnonzero((latitude >= sul) & (latitude <= norte) & dentro_lon)
+        np.testing.assert_array_equal(np.sort(indice.consultar(sul, oeste, norte, leste)), esperado)
+
+@pytest.mark.parametrize('km', [0.5, 50, 3000, 25_000])
+def test_raio(indice, km):
+    indice, latitude, longitude = indice
+    for lat, lon in consultas(latitude, longitude, 20):
+        linhas, distancias = indice.raio(lat, lon, km)
+        todas = haversine(lat, lon, latitude, longitude)
+        np.testing.assert_array_equal(np.sort(linhas), np.flatnonzero(todas <= km))
+        np.testing.assert_allclose(distancias, todas[linhas])
+        assert (np.diff(distancias) >= 0).all()
+
+@pytest.mark.parametrize('k', [1, 10, 100])
+@pytest.mark.parametrize('filtrado', [False, True])
+def test_vizinhos(indice, k, filtrado):
+    indice, latitude, longitude = indice
+    # Um filtro que deixa poucos pontos obriga o raio a crescer muito além do primeiro passo
+    mascara = np.random.default_rng(3).random(len(latitude)) < (0.01 if filtrado else 1.0)
+    filtro = (lambda linhas: mascara[linhas]) if filtrado else None
+    validas = np.flatnonzero(mascara)
+    for lat, lon in consultas(latitude, longitude, 20):
+        linhas, distancias = indice.vizinhos(lat, lon, k, filtro)
+        todas = haversine(lat, lon, latitude[validas], longitude[validas])
+        assert mascara[linhas].all() and len(np.unique(linhas)) == len(linhas) == min(k, len(validas))
+        np.testing.assert_allclose(distancias, np.sort(todas)[:k])
+        np.testing.assert_allclose(distancias, haversine(lat, lon, latitude[linhas], longitude[linhas]))
+
+def test_vizinhos_sem_pontos_suficientes():
+    # Menos pontos que k: devolve todos, do mais próximo ao mais distante
+    latitude, longitude = np.array([10.0, -45.0, 80.0]), np.array([170.0, -179.0, 0.0])
+    linhas, distancias = IndiceGrade(latitude, longitude).vizinhos(0.0, 180.0, 5)
+    np.testing.assert_array_equal(linhas, np.argsort(haversine(0.0, 180.0, latitude, longitude)))
@@ -0,0 +1,144 @@
+# Deltas (utils.ingestao): o snapshot e os agregados atualizados incrementalmente são iguais aos
+# reconstruídos do zero com os mesmos deltas, e um delta inválido é recusado antes da ingestão.
+#
+# Uso: python -m pytest tests
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import pytest
+
+from utils import data
+from utils.agregados import CuboCulinarias, CuboPaises, CulinariasCidades
+from utils.culinarias import IndiceCulinarias
+from utils.ingestao import atualizacao, digest_versao, ler_delta, pasta_deltas, validar_delta
+from utils.snapshot import carregar_snapshot, construir_snapshot, para_pandas
+
+#============================================================
+# Funções
+#============================================================
+
+def escrever_delta(csv_path, nome, delta):
+    pasta = pasta_deltas(csv_path)
+    os.makedirs(pasta, exist_ok=True)
+    path = os.path.join(pasta, nome)
+    delta.to_csv(path, index=False)
+    return path
+
+def delta_alteracoes(csv_path):
+    # Três restaurantes alterados e um novo, numa cidade e com culinárias que já existem
+    bruto = pd.read_csv(csv_path, sep=',').dropna().drop_duplicates('Restaurant ID')
+    alterados = bruto.iloc[[0, 10, 3000]].copy()
+    alterados['Aggregate rating'] = 1.0
+    alterados['Votes'] += 100
+    novo = bruto.iloc[[5]].copy()
+    novo['Restaurant ID'] = 99999999
+    novo['Cuisines'] = 'Italian, Pizza'
+    return pd.concat([alterados, novo])
+
+#============================================================
+# Testes
+#============================================================
+
+def test_incremental_igual_reconstrucao(csv_path, tmp_path):
+    df0 = carregar_snapshot(csv_path, 'csv')
+    indice0 = IndiceCulinarias(df0['Cuisines'])
+    cubo_paises0, cubo_culinarias0 = CuboPaises(df0), CuboCulinarias(df0, indice0)
+    culinarias_cidades0 = CulinariasCidades(df0, indice0)
+
+    deltas = [(escrever_delta(csv_path, '20261018-1.csv', delta_alteracoes(csv_path)), 'delta1')]
+    df1 = carregar_snapshot(csv_path, 'csv', deltas)
+    mudanca = atualizacao(csv_path, digest_versao('csv', ['delta1']))
+    # O snapshot foi atualizado sobre o anterior, não reconstruído
+    assert mudanca is not None and len(mudanca.adicionadas) == 4
+
+    # Snapshot: igual ao construído do zero com o mesmo delta
+    outra = tmp_path / 'reconstrucao'
+    outra.mkdir()
+    shutil.copyfile(csv_path, outra / 'zomato.csv')
+    reconstruido = para_pandas(feather.read_table(construir_snapshot(str(outra / 'zomato.csv'), 'csv', deltas)))
+    pd.testing.assert_frame_equal(df1, reconstruido)
+
+    # Agregados: atualizados com as linhas removidas/adicionadas, iguais aos construídos do zero
+    indice1 = IndiceCulinarias(df1['Cuisines'])
+    cubo_paises = cubo_paises0.atualizado(df1, mudanca.removidas, mudanca.adicionadas)
+    esperado = CuboPaises(df1)
+    for nome in ('contagem', 'soma_votos', 'cidades'):
+        np.testing.assert_array_equal(getattr(cubo_paises, nome), getattr(esperado, nome))
+    for nome in ('soma_nota', 'soma_custo'):
+        np.testing.assert_allclose(getattr(cubo_paises, nome), getattr(esperado, nome))
+
+    cubo_culinarias = cubo_culinarias0.atualizado(df1, indice1, mudanca.removidas, mudanca.adicionadas)
+    esperado = CuboCulinarias(df1, indice1)
+    np.testing.assert_array_equal(cubo_culinarias.contagem, esperado.contagem)
+    for coluna, soma in esperado.somas.items():
+        np.testing.assert_allclose(cubo_culinarias.somas[coluna], soma)
+
+    culinarias_cidades = culinarias_cidades0.atualizado(df1, indice1, mudanca.removidas, mudanca.adicionadas)
+    esperado = CulinariasCidades(df1, indice1)
+    np.testing.assert_array_equal(culinarias_cidades.culinarias, esperado.culinarias)
+    np.testing.assert_array_equal(culinarias_cidades.distintas(), esperado.distintas())
+    np.testing.assert_array_equal(culinarias_cidades.distintas(['Brazil', 'India']), esperado.distintas(['Brazil', 'India']))
+
+def test_ingestao_pela_cli(csv_path, tmp_path, monkeypatch):
+    # O delta aplicado pela CLI, em outro processo, chega ao app como atualização incremental:
+    # os agregados da versão anterior são atualizados, não reconstruídos do zero
+    carregadores = (data.carregar_cubo_paises, data.carregar_cubo_culinarias, data.carregar_culinarias_cidades)
+    for carregar in carregadores:
+        carregar(csv_path)
+
+    path = str(tmp_path / 'delta.csv')
+    delta_alteracoes(csv_path).to_csv(path, index=False)
+    subprocess.run([sys.executable, '-m', 'utils.ingestao', path, '--csv', csv_path], cwd=data.ROOT_DIR, check=True, capture_output=True)
+
+    atualizados = []
+    for classe in (CuboPaises, CuboCulinarias, CulinariasCidades):
+        def atualizado(self, *args, _original=classe.atualizado):
+            atualizados.append(type(self))
+            return _original(self, *args)
+        monkeypatch.setattr(classe, 'atualizado', atualizado)
+        monkeypatch.setattr(data, classe.__name__, lambda *args: pytest.fail('agregado reconstruído do zero'))
+    cubo_paises, cubo_culinarias, culinarias_cidades = [carregar(csv_path) for carregar in carregadores]
+    assert atualizados == [CuboPaises, CuboCulinarias, CulinariasCidades]
+
+    monkeypatch.undo()
+    df = data.carregar_dados(csv_path)
+    indice = data.carregar_indice_culinarias(csv_path)
+    np.testing.assert_array_equal(cubo_paises.contagem, CuboPaises(df).contagem)
+    np.testing.assert_array_equal(cubo_culinarias.contagem, CuboCulinarias(df, indice).contagem)
+    np.testing.assert_array_equal(culinarias_cidades.culinarias, CulinariasCidades(df, indice).culinarias)
+
+def test_delta_valido(csv_path, tmp_path):
+    path = str(tmp_path / 'delta.csv')
+    delta_alteracoes(csv_path).to_csv(path, index=False)
+    assert len(validar_delta(path, csv_path)) == 4
+
+def test_delta_ultima_linha(csv_path, tmp_path):
+    # Um restaurante repetido vale pela última linha do arquivo, mesmo se as linhas são de países
+    # diferentes (o tratamento reagrupa por país, com a Índia antes do Brasil neste delta)
+    bruto = pd.read_csv(csv_path, sep=',').dropna().drop_duplicates('Restaurant ID')
+    india = bruto[bruto['Country Code'] == 1].iloc[[0, 1]]
+    brasil = bruto[bruto['Country Code'] == 30].iloc[[0]]
+    repetido = india.iloc[1]['Restaurant ID']
+    path = str(tmp_path / 'delta.csv')
+    pd.concat([india.iloc[[0]], brasil.assign(**{'Restaurant ID': repetido}), india.iloc[[1]]]).to_csv(path, index=False)
+
+    delta = ler_delta(path)
+    assert len(delta) == 2
+    assert delta.loc[delta['Restaurant ID'] == repetido, 'Country Name'].tolist() == ['India']
+
+@pytest.mark.parametrize('alterar, mensagem', [
+    (lambda delta: delta.drop(columns='Votes'), 'colunas do CSV'),
+    (lambda delta: delta[delta.columns[::-1]], 'mesma ordem'),
+    (lambda delta: delta.assign(Votes='muitos'), 'não numéricos'),
+    (lambda delta: delta.assign(**{'Country Code': 999}), 'nenhuma linha válida'),
+])
+def test_delta_invalido(csv_path, tmp_path, alterar, mensagem):
+    path = str(tmp_path / 'delta.csv')
+    alterar(delta_alteracoes(csv_path)).to_csv(path, index=False)
+    with pytest.raises(ValueError, match=mensagem):
+        validar_delta(path, csv_path)
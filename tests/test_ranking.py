@@ -0,0 +1,64 @@
+# Ranking por nota ponderada (utils.ranking.RankingRestaurantes): o top-k das listas por culinária,
+# juntadas com um heap, é igual ao de ordenar todos os restaurantes filtrados.
+#
+# Uso: python -m pytest tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.culinarias import IndiceCulinarias
+from utils.data import DATASET_PATH
+from utils.limpeza import tipar_colunas, tratar_dados
+from utils.ranking import RankingRestaurantes
+
+#============================================================
+# Funções
+#============================================================
+
+def referencia(ranking, indice, k, linhas, culinarias=None):
+    # Ordenação completa das linhas filtradas pela nota ponderada; empates na ordem do DataFrame
+    if culinarias:
+        linhas = linhas[indice.filtrar(culinarias, linhas=linhas)[linhas]]
+    return linhas[np.argsort(-ranking.nota_ponderada[linhas], kind='stable')][:k]
+
+@pytest.fixture(scope='module')
+def dados():
+    df = tipar_colunas(tratar_dados(pd.read_csv(DATASET_PATH, sep=',')))
+    indice = IndiceCulinarias(df['Cuisines'])
+    return df, indice, RankingRestaurantes(df, indice)
+
+#============================================================
+# Testes
+#============================================================
+
+@pytest.mark.parametrize('k', [1, 10, 500])
+def test_melhores_igual_ordenacao(dados, k):
+    df, indice, ranking = dados
+    rng = np.random.default_rng(k)
+    brasil_india = np.flatnonzero(df['Country Name'].isin(['Brazil', 'India']).to_numpy())
+    for linhas in (np.arange(len(df)), brasil_india, np.flatnonzero(rng.random(len(df)) < 0.1)):
+        np.testing.assert_array_equal(ranking.melhores(k, linhas), referencia(ranking, indice, k, linhas))
+        # Culinárias comuns (restaurantes em várias listas), raras e uma que não existe
+        for culinarias in (['North Indian', 'Chinese', 'Fast Food'], list(rng.choice(indice.vocabulario, 5)), ['Inexistente']):
+            np.testing.assert_array_equal(
+                ranking.melhores(k, linhas, culinarias), referencia(ranking, indice, k, linhas, culinarias)
+            )
+
+def test_redes_igual_groupby(dados):
+    df, _, ranking = dados
+    brasil_india = np.flatnonzero(df['Country Name'].isin(['Brazil', 'India']).to_numpy())
+    for linhas in (np.arange(len(df)), brasil_india):
+        tabela = ranking.tabela_redes(df, 10, linhas)
+        # Referência: groupby pelo nome sobre as linhas filtradas, ordenado pela nota ponderada
+        filtrado = df.iloc[linhas].assign(soma_notas=ranking.soma_notas[linhas])
+        redes = filtrado.groupby('Restaurant Name', sort=False).agg(
+            votos=('Votes', 'sum'), soma_notas=('soma_notas', 'sum'), unidades=('Votes', 'size'),
+            cidade=('City', 'first'), culinarias=('Cuisines', 'first'),
+        )
+        redes['nota'] = ranking._ponderar(redes['soma_notas'].to_numpy(), redes['votos'].to_numpy(dtype=np.float64))
+        redes = redes.sort_values('nota', ascending=False, kind='stable').head(10)
+        assert tabela['Restaurant Name'].tolist() == redes.index.tolist()
+        np.testing.assert_array_equal(tabela['Unidades'], redes['unidades'])
+        np.testing.assert_array_equal(tabela['Total_Votos'], redes['votos'])
+        assert tabela['City'].tolist() == redes['cidade'].tolist()
+        assert tabela['Cuisines'].tolist() == redes['culinarias'].tolist()
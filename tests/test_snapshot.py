@@ -0,0 +1,80 @@
+# Build em streaming do snapshot (utils.snapshot.construir_snapshot) comparado com o tratamento
+# do CSV inteiro de uma vez (tratar_dados + aplicar_deltas).
+#
+# Uso: python -m pytest tests
+import pandas as pd
+import pyarrow.feather as feather
+
+from utils.agregados import CuboPaises
+from utils.ingestao import aplicar_deltas, ler_delta
+from utils.limpeza import tipar_colunas, tratar_dados
+from utils.particoes import ParticoesPaises
+from utils.snapshot import construir_snapshot, para_pandas
+
+# Lotes pequenos, para o CSV de teste passar por vários lotes
+TAMANHO_LOTE = 1000
+
+#============================================================
+# Funções
+#============================================================
+
+def referencia(csv_path, deltas=()):
+    df = tipar_colunas(tratar_dados(pd.read_csv(csv_path, sep=',')))
+    df, _, _ = aplicar_deltas(df, [ler_delta(caminho) for caminho in deltas])
+    return df
+
+def construir(csv_path, deltas=()):
+    path = construir_snapshot(csv_path, 'csv', [(caminho, f'delta{i}') for i, caminho in enumerate(deltas)], TAMANHO_LOTE)
+    return para_pandas(feather.read_table(path))
+
+#============================================================
+# Testes
+#============================================================
+
+def test_sem_deltas(csv_path):
+    pd.testing.assert_frame_equal(construir(csv_path), referencia(csv_path))
+
+def test_delta_com_notas_inteiras(csv_path, tmp_path):
+    # No delta, 'Aggregate rating' é inferido como int64; no CSV, como float64
+    delta = pd.read_csv(csv_path, sep=',').dropna().iloc[[10, 2000, 5000]]
+    delta['Aggregate rating'] = [4, 3, 5]
+    delta_path = str(tmp_path / 'delta.csv')
+    delta.to_csv(delta_path, index=False)
+    assert pd.read_csv(delta_path)['Aggregate rating'].dtype == 'int64'
+
+    df = construir(csv_path, [delta_path])
+    pd.testing.assert_frame_equal(df, referencia(csv_path, [delta_path]))
+    notas = df.set_index('Restaurant ID').loc[delta['Restaurant ID'], 'Aggregate rating']
+    assert notas.tolist() == [4.0, 3.0, 5.0]
+
+def test_lote_com_tipo_mais_largo(csv_path):
+    # 'Average Cost for two' é int64 nos primeiros lotes e float64 num lote do meio:
+    # o resultado é float64 em todas as linhas, sem truncar o valor decimal
+    bruto = pd.read_csv(csv_path, sep=',')
+    bruto['Average Cost for two'] = bruto['Average Cost for two'].astype(object)
+    bruto.loc[5500, 'Average Cost for two'] = 250.5
+    bruto.to_csv(csv_path, index=False)
+
+    df = construir(csv_path)
+    pd.testing.assert_frame_equal(df, referencia(csv_path))
+    assert df['Average Cost for two'].dtype == 'float64'
+    assert (df['Average Cost for two'] == 250.5).sum() == 1
+
+def test_pais_desconhecido(csv_path, tmp_path):
+    # Um 'Country Code' fora de COUNTRIES, no CSV ou num delta, é descartado no tratamento
+    bruto = pd.read_csv(csv_path, sep=',')
+    bruto.loc[3000, 'Country Code'] = 999
+    bruto.to_csv(csv_path, index=False)
+    delta = bruto.dropna().iloc[[20, 4000]].copy()
+    delta['Country Code'] = [999, 1]
+    delta_path = str(tmp_path / 'delta.csv')
+    delta.to_csv(delta_path, index=False)
+
+    df = construir(csv_path, [delta_path])
+    pd.testing.assert_frame_equal(df, referencia(csv_path, [delta_path]))
+    assert df['Country Name'].notna().all()
+    # A linha inválida do delta não substitui a do CSV
+    assert (df['Restaurant ID'] == delta['Restaurant ID'].iloc[0]).sum() == 1
+    assert 999 not in df['Country Code'].to_numpy()
+    assert len(ParticoesPaises(df).linhas([])) == len(df)
+    assert CuboPaises(df).contagem.sum() == len(df)
@@ -0,0 +1,335 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import CacheLRU
+from utils.culinarias import entradas_culinarias
+
+#============================================================
+# Cubo de agregados por país
+#============================================================
+
+class CuboPaises:
+    # Agregados parciais por país, construídos uma vez no carregamento:
+    # contagem, soma de notas, soma de votos, soma do custo para dois e a contagem de
+    # restaurantes por (país, cidade) sobre os códigos de 'City'.
+    # Todos são combináveis (somas), então qualquer seleção de países é respondida
+    # fatiando no máximo 15 linhas, sem reler os restaurantes. Como são somas, também
+    # podem ser atualizados com as linhas removidas/adicionadas por um delta.
+    COLUNAS = ['Aggregate rating', 'Votes', 'Average Cost for two']
+
+    def __init__(self, df):
+        paises = df['Country Name'].cat
+        n_paises = len(paises.categories)
+
+        self.paises = paises.categories
+        self.categorias_cidades = df['City'].cat.categories
+        self.posicoes = {nome: i for i, nome in enumerate(self.paises)}
+        self.contagem = np.zeros(n_paises, dtype=np.int64)
+        self.soma_nota = np.zeros(n_paises, dtype=np.float64)
+        self.soma_votos = np.zeros(n_paises, dtype=np.int64)
+        self.soma_custo = np.zeros(n_paises, dtype=np.float64)
+        self.cidades = np.zeros((n_paises, len(self.categorias_cidades)), dtype=np.int64)
+        self._acumular(df, 1)
+
+    def _acumular(self, linhas, sinal):
+        codigos = linhas['Country Name'].cat.codes.to_numpy(dtype=np.int64)
+        n_paises, n_cidades = self.cidades.shape
+        self.contagem += sinal * np.bincount(codigos, minlength=n_paises)
+        # Somas pelo groupby do pandas (soma compensada), para as médias baterem com groupby().mean()
+        somas = linhas.groupby('Country Name', observed=False)[self.COLUNAS].sum()
+        self.soma_nota += sinal * somas['Aggregate rating'].to_numpy(dtype=np.float64)
+        self.soma_votos += sinal * somas['Votes'].to_numpy(dtype=np.int64)
+        self.soma_custo += sinal * somas['Average Cost for two'].to_numpy(dtype=np.float64)
+        chave = codigos * n_cidades + linhas['City'].cat.codes.to_numpy(dtype=np.int64)
+        self.cidades += sinal * np.bincount(chave, minlength=n_paises * n_cidades).reshape(n_paises, n_cidades)
+
+    def atualizado(self, df, removidas, adicionadas):
+        # Cópia atualizada com um delta; None se o delta mudou as categorias de 'City' (aí o cubo é refeito)
+        if not self.categorias_cidades.equals(df['City'].cat.categories):
+            return None
+        novo = copy.copy(self)
+        for nome in ('contagem', 'soma_nota', 'soma_votos', 'soma_custo', 'cidades'):
+            setattr(novo, nome, getattr(self, nome).copy())
+        novo._acumular(removidas, -1)
+        novo._acumular(adicionadas, 1)
+        return novo
+
+    def _selecao(self, selected_countries):
+        # Posições dos países selecionados que têm restaurantes (seleção vazia = todos)
+        if selected_countries:
+            posicoes = np.array(sorted(self.posicoes[nome] for nome in selected_countries if nome in self.posicoes), dtype=np.int64)
+        else:
+            posicoes = np.arange(len(self.paises))
+        return posicoes[self.contagem[posicoes] > 0]
+
+    def fatiar(self, selected_countries=None):
+        # Uma linha por país selecionado, na ordem das categorias
+        posicoes = self._selecao(selected_countries)
+        contagem = self.contagem[posicoes]
+        return pd.DataFrame({
+            'Country Name': self.paises[posicoes],
+            'Counts': contagem,
+            'City Count': (self.cidades[posicoes] > 0).sum(axis=1, dtype=np.int64),
+            'Aggregate rating': self.soma_nota[posicoes] / contagem,
+            'Votes': self.soma_votos[posicoes],
+            'Average Cost for two': self.soma_custo[posicoes] / contagem,
+        })
+
+    def combinar(self, selected_countries=None):
+        # Totais da seleção, combinando os agregados parciais dos países
+        posicoes = self._selecao(selected_countries)
+        contagem = int(self.contagem[posicoes].sum())
+        return {
+            'Countries': len(posicoes),
+            'Counts': contagem,
+            'City Count': int((self.cidades[posicoes].sum(axis=0) > 0).sum()),
+            'Aggregate rating': self.soma_nota[posicoes].sum() / contagem if contagem else np.nan,
+            'Votes': int(self.soma_votos[posicoes].sum()),
+            'Average Cost for two': self.soma_custo[posicoes].sum() / contagem if contagem else np.nan,
+        }
+
+#============================================================
+# Cubo de agregados por país e culinária
+#============================================================
+
+class CuboCulinarias:
+    # Somas de 'Aggregate rating' e 'Votes' e contagem de restaurantes por (país, culinária),
+    # construídas uma vez a partir das entradas do índice de culinárias. Qualquer seleção
+    # de países é respondida somando no máximo 15 linhas destas tabelas.
+    COLUNAS = ('Aggregate rating', 'Votes')
+    # Catálogos (opções + mais frequentes) guardados por seleção de países
+    MAX_CATALOGOS = 256
+
+    def __init__(self, df, indice_culinarias):
+        paises = df['Country Name'].cat
+        n_paises, n_culinarias = len(paises.categories), len(indice_culinarias.vocabulario)
+
+        self.culinarias = indice_culinarias.vocabulario
+        self.posicoes = {nome: i for i, nome in enumerate(paises.categories)}
+        self.contagem = np.zeros((n_paises, n_culinarias), dtype=np.int64)
+        self.somas = {coluna: np.zeros((n_paises, n_culinarias), dtype=np.float64) for coluna in self.COLUNAS}
+        self._acumular(df, indice_culinarias.linha_da_entrada, indice_culinarias.indices, 1)
+        self._catalogos = CacheLRU(self.MAX_CATALOGOS, tamanho=lambda catalogo: 1)
+
+    def __getstate__(self):
+        # O cache de catálogos (lock + lambda) não vai para o pickle do build; é refeito vazio
+        estado = self.__dict__.copy()
+        del estado['_catalogos']
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._catalogos = CacheLRU(self.MAX_CATALOGOS, tamanho=lambda catalogo: 1)
+
+    def _acumular(self, linhas, linha_da_entrada, culinaria_da_entrada, sinal):
+        n_paises, n_culinarias = self.contagem.shape
+        chave = linhas['Country Name'].cat.codes.to_numpy(dtype=np.int64)[linha_da_entrada] * n_culinarias + culinaria_da_entrada
+        self.contagem += sinal * np.bincount(chave, minlength=n_paises * n_culinarias).reshape(n_paises, n_culinarias)
+        for coluna in self.COLUNAS:
+            self.somas[coluna] += sinal * np.bincount(
+                chave, weights=linhas[coluna].to_numpy(dtype=np.float64)[linha_da_entrada], minlength=n_paises * n_culinarias
+            ).reshape(n_paises, n_culinarias)
+
+    def atualizado(self, df, indice_culinarias, removidas, adicionadas):
+        # Cópia atualizada com um delta; None se o delta mudou o vocabulário de culinárias
+        if not np.array_equal(self.culinarias, indice_culinarias.vocabulario):
+            return None
+        novo = copy.copy(self)
+        novo.contagem = self.contagem.copy()
+        novo.somas = {coluna: soma.copy() for coluna, soma in self.somas.items()}
+        novo._catalogos = CacheLRU(self.MAX_CATALOGOS, tamanho=lambda catalogo: 1)
+        for linhas, sinal in ((removidas, -1), (adicionadas, 1)):
+            novo._acumular(linhas, *entradas_culinarias(linhas['Cuisines'], indice_culinarias.posicoes), sinal)
+        return novo
+
+    def _selecao(self, selected_countries):
+        # Seleção vazia = todos os países
+        if not selected_countries:
+            return slice(None)
+        return sorted(self.posicoes[nome] for nome in selected_countries if nome in self.posicoes)
+
+    def medias(self, coluna, selected_countries=None):
+        # Series culinária -> média da coluna nos países escolhidos, só com as culinárias presentes
+        # (mesmo formato de IndiceCulinarias.medias)
+        posicoes = self._selecao(selected_countries)
+        contagens = self.contagem[posicoes].sum(axis=0)
+        presentes = contagens > 0
+        medias = self.somas[coluna][posicoes].sum(axis=0)[presentes] / contagens[presentes]
+        return pd.Series(medias, index=self.culinarias[presentes]).rename_axis('Cuisines')
+
+    def frequencias(self, selected_countries=None):
+        # Restaurantes por culinária nos países escolhidos, na ordem (alfabética) do vocabulário
+        return self.contagem[self._selecao(selected_countries)].sum(axis=0)
+
+    def catalogo(self, selected_countries=None, n=5):
+        # (culinárias presentes em ordem alfabética, as n mais frequentes) da seleção de países
+        paises = tuple(sorted(selected_countries or ()))
+        return self._catalogos.obter((paises, n), lambda: self._montar_catalogo(paises, n))
+
+    def _montar_catalogo(self, paises, n):
+        contagens = self.frequencias(list(paises))
+        presentes = np.flatnonzero(contagens > 0)
+        mais_frequentes = presentes[selecionar_top(contagens[presentes], n)]
+        return tuple(self.culinarias[presentes]), tuple(self.culinarias[mais_frequentes])
+
+#============================================================
+# Culinárias por cidade
+#============================================================
+
+class CulinariasCidades:
+    # Quantos restaurantes de cada par (país, cidade) têm cada culinária do vocabulário do
+    # índice de culinárias. Construído uma vez a partir dos códigos inteiros de país, cidade e
+    # culinária; o filtro de países só escolhe pares inteiros, então a contagem de culinárias
+    # distintas por cidade é exata para qualquer seleção, sem processar strings na consulta.
+    # Contagens (em vez de bits) permitem remover os restaurantes alterados por um delta; ficam
+    # em int32, o bastante para os restaurantes de uma culinária em uma cidade.
+
+    def __init__(self, df, indice_culinarias):
+        paises = df['Country Name'].cat
+        cidades = df['City'].cat
+
+        self.cidades = cidades.categories
+        self.vocabulario = indice_culinarias.vocabulario
+        self.posicoes = {nome: i for i, nome in enumerate(paises.categories)}
+        self.pares = np.unique(self._codigos_par(df))
+        self.pais_do_par = self.pares // len(self.cidades)
+        self.cidade_do_par = self.pares % len(self.cidades)
+        self.culinarias = np.zeros((len(self.pares), len(self.vocabulario)), dtype=np.int32)
+        self._acumular(df, indice_culinarias.linha_da_entrada, indice_culinarias.indices, 1)
+
+    def _codigos_par(self, linhas):
+        return (
+            linhas['Country Name'].cat.codes.to_numpy(dtype=np.int64) * len(self.cidades)
+            + linhas['City'].cat.codes.to_numpy(dtype=np.int64)
+        )
+
+    def _acumular(self, linhas, linha_da_entrada, culinaria_da_entrada, sinal):
+        # Só as células (par, culinária) presentes nas linhas são tocadas, sem uma matriz temporária
+        n_culinarias = self.culinarias.shape[1]
+        par = np.searchsorted(self.pares, self._codigos_par(linhas))[linha_da_entrada]
+        celulas, contagens = np.unique(par * n_culinarias + culinaria_da_entrada, return_counts=True)
+        self.culinarias[celulas // n_culinarias, celulas % n_culinarias] += sinal * contagens.astype(np.int32)
+
+    def atualizado(self, df, indice_culinarias, removidas, adicionadas):
+        # Cópia atualizada com um delta; None se o delta trouxe cidade, par (país, cidade)
+        # ou culinária que ainda não existiam (aí a estrutura é refeita)
+        if not (
+            self.cidades.equals(df['City'].cat.categories)
+            and np.array_equal(self.vocabulario, indice_culinarias.vocabulario)
+            and np.isin(self._codigos_par(adicionadas), self.pares).all()
+        ):
+            return None
+        novo = copy.copy(self)
+        novo.culinarias = self.culinarias.copy()
+        for linhas, sinal in ((removidas, -1), (adicionadas, 1)):
+            novo._acumular(linhas, *entradas_culinarias(linhas['Cuisines'], indice_culinarias.posicoes), sinal)
+        return novo
+
+    def distintas(self, selected_countries=None):
+        # Culinárias distintas por cidade nos países escolhidos (seleção vazia = todos),
+        # alinhadas às categorias de 'City' (0 para cidades fora da seleção)
+        if selected_countries:
+            codigos = [self.posicoes[nome] for nome in selected_countries if nome in self.posicoes]
+            pares = np.flatnonzero(np.isin(self.pais_do_par, codigos))
+        else:
+            pares = np.arange(len(self.pares))
+        # Uma cidade com o mesmo nome em mais de um país junta as culinárias presentes dos pares
+        # (OU sobre os pares da cidade, agrupados pela ordenação)
+        cidades = self.cidade_do_par[pares]
+        ordem = np.argsort(cidades, kind='stable')
+        cidades = cidades[ordem]
+        inicios = np.flatnonzero(np.diff(cidades, prepend=-1))
+        distintas = np.zeros(len(self.cidades), dtype=np.int64)
+        if len(pares):
+            presentes = np.logical_or.reduceat(self.culinarias[pares[ordem]] > 0, inicios, axis=0)
+            distintas[cidades[inicios]] = presentes.sum(axis=1)
+        return distintas
+
+#============================================================
+# Junção de agregados construídos por partição
+#============================================================
+# Cada país fica inteiro em uma partição (ver utils.build), então cada célula por país recebe
+# a contribuição de uma única parte: somar as partes dá exatamente o agregado do dataset todo.
+# As partes usam as categorias globais de país e cidade, mas o vocabulário de culinárias de cada
+# parte é só o dela; as colunas são reposicionadas no vocabulário global.
+
+def juntar_cubos_paises(partes):
+    cubo = copy.copy(partes[0])
+    for nome in ('contagem', 'soma_nota', 'soma_votos', 'soma_custo', 'cidades'):
+        setattr(cubo, nome, sum(getattr(parte, nome) for parte in partes))
+    return cubo
+
+def juntar_cubos_culinarias(partes, vocabulario):
+    cubo = copy.copy(partes[0])
+    cubo.culinarias = vocabulario
+    cubo.contagem = np.zeros((len(partes[0].posicoes), len(vocabulario)), dtype=np.int64)
+    cubo.somas = {coluna: np.zeros(cubo.contagem.shape, dtype=np.float64) for coluna in cubo.COLUNAS}
+    cubo._catalogos = CacheLRU(cubo.MAX_CATALOGOS, tamanho=lambda catalogo: 1)
+    for parte in partes:
+        colunas = np.searchsorted(vocabulario, parte.culinarias)
+        cubo.contagem[:, colunas] += parte.contagem
+        for coluna in cubo.COLUNAS:
+            cubo.somas[coluna][:, colunas] += parte.somas[coluna]
+    return cubo
+
+def juntar_culinarias_cidades(partes, vocabulario):
+    # Os pares (país, cidade) das partes são disjuntos; ficam ordenados como em np.unique
+    culinarias = copy.copy(partes[0])
+    culinarias.vocabulario = vocabulario
+    culinarias.pares = np.concatenate([parte.pares for parte in partes])
+    ordem = np.argsort(culinarias.pares, kind='stable')
+    culinarias.pares = culinarias.pares[ordem]
+    culinarias.pais_do_par = culinarias.pares // len(culinarias.cidades)
+    culinarias.cidade_do_par = culinarias.pares % len(culinarias.cidades)
+    matriz = np.zeros((len(ordem), len(vocabulario)), dtype=partes[0].culinarias.dtype)
+    inicio = 0
+    for parte in partes:
+        fim = inicio + len(parte.pares)
+        matriz[inicio:fim, np.searchsorted(vocabulario, parte.vocabulario)] = parte.culinarias
+        inicio = fim
+    culinarias.culinarias = matriz[ordem]
+    return culinarias
+
+#============================================================
+# Estatísticas por cidade
+#============================================================
+
+def estatisticas_cidades(df, culinarias_distintas, linhas=None):
+    # Contagem, nota média e culinárias distintas por cidade das linhas escolhidas (todas se None),
+    # em uma passada sobre os códigos de 'City' (bincount, sem ordenar nem laço por cidade);
+    # culinarias_distintas vem de CulinariasCidades.distintas. Uma linha por cidade presente,
+    # na ordem das categorias.
+    cidades = df['City'].cat
+    codigos = cidades.codes.to_numpy()
+    notas = df['Aggregate rating'].to_numpy(dtype=np.float64)
+    if linhas is not None:
+        posicoes = np.asarray(linhas)
+        codigos, notas = codigos[posicoes], notas[posicoes]
+
+    contagem = np.bincount(codigos, minlength=len(cidades.categories))
+    soma_nota = np.bincount(codigos, weights=notas, minlength=len(cidades.categories))
+    presentes = contagem > 0
+    return pd.DataFrame({
+        'City': cidades.categories[presentes],
+        'Restaurant ID': contagem[presentes],
+        'Aggregate rating': soma_nota[presentes] / contagem[presentes],
+        'Unique Cuisine Count': culinarias_distintas[presentes],
+    })
+
+#============================================================
+# Seleção parcial
+#============================================================
+
+def selecionar_top(valores, k, crescente=False):
+    # Posições dos k maiores (ou menores) valores, já ordenadas, por seleção parcial (argpartition)
+    # em vez de ordenar tudo. Empates mantêm a ordem da tabela, inclusive no corte do k-ésimo.
+    chave = np.asarray(valores, dtype=np.float64)
+    chave = chave if crescente else -chave
+    if k < len(chave):
+        limite = chave[np.argpartition(chave, k - 1)[k - 1]]
+        candidatos = np.flatnonzero(chave <= limite)
+    else:
+        candidatos = np.arange(len(chave))
+    return candidatos[np.argsort(chave[candidatos], kind='stable')][:k]
@@ -0,0 +1,158 @@
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.agregados import (CuboCulinarias, CuboPaises, CulinariasCidades, juntar_culinarias_cidades,
+                             juntar_cubos_culinarias, juntar_cubos_paises)
+from utils.culinarias import IndiceCulinarias
+from utils.ingestao import aplicar_deltas, digest_versao, ler_delta
+from utils.limpeza import derivar_colunas, paises_conhecidos, particionar_por_pais, tipar_colunas
+from utils.particoes import ParticoesPaises
+from utils.snapshot import caminho_snapshot, escrever_snapshot
+
+# Agregados gerados pelo build, ao lado do snapshot: dataset/zomato.csv -> dataset/zomato.agregados.pkl
+SUFIXO_AGREGADOS = '.agregados.pkl'
+
+# Último arquivo de agregados lido neste processo: (caminho, versão, agregados)
+_lidos = (None, None, None)
+
+#============================================================
+# Agregados gerados
+#============================================================
+
+def caminho_agregados(csv_path):
+    return os.path.splitext(csv_path)[0] + SUFIXO_AGREGADOS
+
+def escrever_agregados(csv_path, versao, agregados):
+    # Escrita atômica, como a do snapshot
+    path = caminho_agregados(csv_path)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'versao': versao, 'agregados': agregados}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+def ler_agregados(csv_path, versao):
+    # Agregados do build para esta versão do dataset, ou None se não houver build dela.
+    # O arquivo é gerado localmente pelo próprio build (pickle não deve vir de fora).
+    global _lidos
+    path = caminho_agregados(csv_path)
+    if _lidos[:2] == (path, versao):
+        return _lidos[2]
+    try:
+        with open(path, 'rb') as f:
+            gerado = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if gerado['versao'] != versao:
+        return None
+    _lidos = (path, versao, gerado['agregados'])
+    return _lidos[2]
+
+#============================================================
+# Etapas por partição (rodam nos processos do pool)
+#============================================================
+
+def _tratar_particao(parte):
+    # Mesmo tratamento de tratar_dados, restrito a um 'Country Code'. Linhas duplicadas têm o
+    # mesmo país, então o drop_duplicates por partição é igual ao do dataset inteiro.
+    parte = parte.dropna().drop_duplicates()
+    return derivar_colunas(parte[paises_conhecidos(parte)])
+
+def _agregar_particao(parte):
+    # Agregados de um país; as categorias de país e cidade já são as do dataset inteiro
+    parte = parte.reset_index(drop=True)
+    indice = IndiceCulinarias(parte['Cuisines'])
+    return CuboPaises(parte), CuboCulinarias(parte, indice), CulinariasCidades(parte, indice)
+
+def _mapear(executor, funcao, partes):
+    # Partes maiores primeiro, para o último processo não ficar com o maior país sozinho
+    if executor is None:
+        return [funcao(parte) for parte in partes]
+    ordem = sorted(range(len(partes)), key=lambda i: -len(partes[i]))
+    futuros = {i: executor.submit(funcao, partes[i]) for i in ordem}
+    return [futuros[i].result() for i in range(len(partes))]
+
+#============================================================
+# Build
+#============================================================
+
+def construir(csv_path, csv_digest, deltas=(), processos=None):
+    # Snapshot + agregados por país em um pool de processos, particionando por 'Country Code'.
+    # Retorna [(etapa, segundos)]. processos=1 roda tudo no processo atual, para comparação.
+    processos = processos or os.cpu_count()
+    tempos = []
+    inicio = time.perf_counter()
+
+    def etapa(nome):
+        nonlocal inicio
+        agora = time.perf_counter()
+        tempos.append((nome, agora - inicio))
+        inicio = agora
+
+    executor = ProcessPoolExecutor(processos) if processos > 1 else None
+    try:
+        if executor is not None:
+            # Sobe os processos antes, para o custo não cair na primeira etapa
+            list(executor.map(int, range(processos)))
+            etapa('pool')
+
+        bruto = pd.read_csv(csv_path, sep=',')
+        partes = [parte for _, parte in bruto.groupby('Country Code', sort=False)]
+        del bruto
+        etapa('leitura')
+
+        tratadas = _mapear(executor, _tratar_particao, partes)
+        etapa('limpeza')
+
+        # Países na ordem da primeira linha que sobrou no CSV (a mesma de particionar_por_pais)
+        tratadas = [parte for parte in tratadas if len(parte)]
+        tratadas.sort(key=lambda parte: parte.index[0])
+        df = pd.concat(tratadas)
+        df.reset_index(drop=True, inplace=True)
+        df = tipar_colunas(particionar_por_pais(df))
+        df, _, _ = aplicar_deltas(df, [ler_delta(caminho) for caminho, _ in deltas])
+        etapa('junção')
+
+        digests = [digest for _, digest in deltas]
+        versao = digest_versao(csv_digest, digests)
+        escrever_snapshot(df, caminho_snapshot(csv_path), versao, csv_digest, digests)
+        etapa('snapshot')
+
+        particoes = [df.iloc[inicio_pais:fim] for inicio_pais, fim in ParticoesPaises(df).limites.values()]
+        agregados = _mapear(executor, _agregar_particao, particoes)
+        etapa('agregados')
+
+        # O vocabulário global é a união dos vocabulários dos países, que já vêm das linhas finais
+        # (com os deltas aplicados), ordenada como o de IndiceCulinarias
+        cubos_paises, cubos_culinarias, culinarias_cidades = zip(*agregados)
+        vocabulario = np.unique(np.concatenate([cubo.culinarias for cubo in cubos_culinarias]))
+        escrever_agregados(csv_path, versao, {
+            'cubo_paises': juntar_cubos_paises(cubos_paises),
+            'cubo_culinarias': juntar_cubos_culinarias(cubos_culinarias, vocabulario),
+            'culinarias_cidades': juntar_culinarias_cidades(culinarias_cidades, vocabulario),
+        })
+        etapa('junção dos agregados')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return tempos
+
+if __name__ == '__main__':
+    from utils.data import DATASET_PATH, assinatura_arquivo, deltas_dados
+
+    parser = argparse.ArgumentParser(description='Gera o snapshot e os agregados por país em um pool de processos.')
+    parser.add_argument('csv', nargs='?', default=DATASET_PATH)
+    parser.add_argument('--processos', type=int, default=None, help='processos do pool (padrão: núcleos da máquina)')
+    args = parser.parse_args()
+
+    _, csv_digest = assinatura_arquivo(args.csv)
+    tempos = construir(args.csv, csv_digest, deltas_dados(args.csv), args.processos)
+    for nome, segundos in tempos:
+        print(f'{nome:<22}{segundos * 1000:9.1f} ms')
+    print(f'{"total":<22}{sum(segundos for _, segundos in tempos) * 1000:9.1f} ms')
@@ -0,0 +1,63 @@
+import sys
+import threading
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+#============================================================
+# Cache LRU com orçamento de bytes
+#============================================================
+
+class CacheLRU:
+    # Cache compartilhado entre sessões (threads do Streamlit): ao passar de max_bytes,
+    # descarta os itens usados há mais tempo. O tamanho de cada valor vem de `tamanho`.
+
+    def __init__(self, max_bytes, tamanho=sys.getsizeof):
+        self.max_bytes = max_bytes
+        self.tamanho = tamanho
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, chave):
+        return chave in self._itens
+
+    def get(self, chave, default=None):
+        with self._lock:
+            if chave not in self._itens:
+                self.faltas += 1
+                return default
+            self.acertos += 1
+            self._itens.move_to_end(chave)
+            return self._itens[chave][0]
+
+    def set(self, chave, valor):
+        tamanho = self.tamanho(valor)
+        with self._lock:
+            if chave in self._itens:
+                self.bytes -= self._itens.pop(chave)[1]
+            # Um valor maior que o orçamento inteiro não é guardado
+            if tamanho <= self.max_bytes:
+                self._itens[chave] = (valor, tamanho)
+                self.bytes += tamanho
+                while self.bytes > self.max_bytes:
+                    _, (_, tamanho_antigo) = self._itens.popitem(last=False)
+                    self.bytes -= tamanho_antigo
+        return valor
+
+    def obter(self, chave, criar):
+        # Valor em cache ou, se não houver, o resultado de criar() (que passa a ficar em cache)
+        valor = self.get(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = self.set(chave, criar())
+        return valor
+
+    def valores(self):
+        # Cópia dos (chave, valor) do mais antigo ao mais recente, sem contar como acesso
+        with self._lock:
+            return [(chave, valor) for chave, (valor, _) in self._itens.items()]
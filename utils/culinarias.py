@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# Modos de combinação do filtro de culinárias
+MODO_OU = 'ou'  # restaurante com qualquer uma das culinárias
+MODO_E = 'e'    # restaurante com todas as culinárias
+
+#============================================================
+# Índice de culinárias
+#============================================================
+
+def entradas_culinarias(cuisines, posicoes):
+    # (posição da linha, código da culinária) de cada culinária de uma Series de 'Cuisines',
+    # com os códigos de um vocabulário já existente (posicoes: nome -> código)
+    tokens = cuisines.reset_index(drop=True).str.split(', ').explode()
+    return tokens.index.to_numpy(dtype=np.int64), tokens.map(posicoes).to_numpy(dtype=np.int64)
+
+class IndiceCulinarias:
+    # Vocabulário ordenado de culinárias + incidência restaurante x culinária em formato CSR:
+    # as culinárias da linha i são indices[indptr[i]:indptr[i + 1]].
+    # As linhas são as posições do DataFrame tratado (RangeIndex), então o índice
+    # de um df_filtered pode ser usado diretamente como seleção.
+
+    def __init__(self, cuisines):
+        tokens = cuisines.str.split(', ').explode()
+        codigos, vocabulario = pd.factorize(tokens, sort=True)
+
+        self.n_linhas = len(cuisines)
+        self.vocabulario = np.asarray(vocabulario, dtype=object)
+        self.indices = codigos.astype(np.int32)
+        self.linha_da_entrada = tokens.index.to_numpy(dtype=np.int64)
+        self.indptr = np.zeros(self.n_linhas + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.linha_da_entrada, minlength=self.n_linhas), out=self.indptr[1:])
+
+        # Bitmap de linhas por culinária (1 bit por restaurante) para o filtro exato
+        self.posicoes = {nome: i for i, nome in enumerate(self.vocabulario)}
+        # (mesmo layout de np.packbits: bit mais significativo primeiro)
+        self.bitmaps = np.zeros((len(self.vocabulario), (self.n_linhas + 7) // 8), dtype=np.uint8)
+        bits = np.left_shift(1, 7 - (self.linha_da_entrada & 7)).astype(np.uint8)
+        np.bitwise_or.at(self.bitmaps, (self.indices, self.linha_da_entrada >> 3), bits)
+
+    def _linhas_para_mascara(self, linhas):
+        # Aceita posições (ex.: df_filtered.index) ou uma máscara booleana
+        linhas = np.asarray(linhas)
+        if linhas.dtype == bool:
+            return linhas
+        mascara = np.zeros(self.n_linhas, dtype=bool)
+        mascara[linhas] = True
+        return mascara
+
+    def _entradas(self, linhas):
+        # Máscara sobre as entradas (linha, culinária) das linhas selecionadas
+        if linhas is None:
+            return slice(None)
+        return self._linhas_para_mascara(linhas)[self.linha_da_entrada]
+
+    def contagens(self, linhas=None):
+        # Quantidade de restaurantes por culinária (na ordem do vocabulário)
+        return np.bincount(self.indices[self._entradas(linhas)], minlength=len(self.vocabulario))
+
+    def somas(self, valores, linhas=None):
+        # Soma de uma coluna numérica por culinária
+        entradas = self._entradas(linhas)
+        pesos = np.asarray(valores, dtype=np.float64)[self.linha_da_entrada[entradas]]
+        return np.bincount(self.indices[entradas], weights=pesos, minlength=len(self.vocabulario))
+
+    def distintas(self, linhas=None):
+        return int(np.count_nonzero(self.contagens(linhas)))
+
+    def frequencias(self, linhas=None):
+        # Series culinária -> contagem, só com as culinárias presentes
+        contagens = self.contagens(linhas)
+        presentes = contagens > 0
+        return pd.Series(contagens[presentes], index=self.vocabulario[presentes], name='Counts').rename_axis('Cuisines')
+
+    def medias(self, valores, linhas=None):
+        # Series culinária -> média da coluna, só com as culinárias presentes
+        contagens = self.contagens(linhas)
+        presentes = contagens > 0
+        medias = self.somas(valores, linhas)[presentes] / contagens[presentes]
+        return pd.Series(medias, index=self.vocabulario[presentes]).rename_axis('Cuisines')
+
+    def filtrar(self, culinarias, modo=MODO_OU, linhas=None):
+        # Máscara booleana (sobre todas as linhas) dos restaurantes com as culinárias escolhidas.
+        # Comparação exata pelo nome ('Bar' não casa com 'Bar Food').
+        codigos = [self.posicoes[nome] for nome in culinarias if nome in self.posicoes]
+        if modo == MODO_E and len(codigos) < len(set(culinarias)):
+            # Alguma culinária pedida não existe: nenhum restaurante tem todas
+            return np.zeros(self.n_linhas, dtype=bool)
+        if not codigos:
+            return np.zeros(self.n_linhas, dtype=bool)
+
+        reduzir = np.bitwise_and if modo == MODO_E else np.bitwise_or
+        bits = reduzir.reduce(self.bitmaps[codigos], axis=0)
+        mascara = np.unpackbits(bits, count=self.n_linhas).view(bool)
+        if linhas is not None:
+            mascara &= self._linhas_para_mascara(linhas)
+        return mascara
+
+    def contem(self, culinarias, linhas, modo=MODO_OU):
+        # Como filtrar(), mas testa só as linhas dadas (ex.: candidatos de uma consulta espacial)
+        linhas = np.asarray(linhas, dtype=np.int64)
+        codigos = [self.posicoes[nome] for nome in culinarias if nome in self.posicoes]
+        if not codigos or (modo == MODO_E and len(codigos) < len(set(culinarias))):
+            return np.zeros(len(linhas), dtype=bool)
+        bits = (self.bitmaps[codigos][:, linhas >> 3] & np.left_shift(1, 7 - (linhas & 7)).astype(np.uint8)) > 0
+        return bits.all(axis=0) if modo == MODO_E else bits.any(axis=0)
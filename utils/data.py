@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+
+import streamlit as st
+
+from utils.agregados import CuboCulinarias, CuboPaises, CulinariasCidades
+from utils.build import ler_agregados
+from utils.culinarias import IndiceCulinarias
+from utils.espacial import IndiceGrade
+from utils.ingestao import atualizacao, caminhos_deltas, digest_versao
+from utils.limpeza import COUNTRIES
+from utils.particoes import ParticoesPaises
+from utils.ranking import RankingRestaurantes
+from utils.snapshot import carregar_snapshot
+
+# Caminho absoluto do dataset, independente do diretório de execução
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(ROOT_DIR, 'dataset', 'zomato.csv')
+
+#============================================================
+# Carregamento com cache
+#============================================================
+
+# Hash do arquivo por (caminho, mtime, tamanho): só é recalculado quando o arquivo muda.
+# Compartilhado pelas sessões (threads do Streamlit): consulta, cálculo e descarte sob o lock,
+# como no CacheLRU, e um arquivo novo é lido uma vez só, mesmo com várias sessões chegando juntas
+_hashes = {}
+_lock_hashes = threading.Lock()
+
+def assinatura_arquivo(path=DATASET_PATH):
+    stat = os.stat(path)
+    chave = (path, stat.st_mtime_ns, stat.st_size)
+    with _lock_hashes:
+        if chave not in _hashes:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for bloco in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(bloco)
+            # Mantém apenas a versão atual de cada arquivo
+            for antiga in [k for k in _hashes if k[0] == path]:
+                del _hashes[antiga]
+            _hashes[chave] = sha.hexdigest()
+        return stat.st_mtime_ns, _hashes[chave]
+
+def deltas_dados(path=DATASET_PATH):
+    # [(caminho, hash)] dos deltas do dataset, na ordem de aplicação
+    return [(caminho, assinatura_arquivo(caminho)[1]) for caminho in caminhos_deltas(path)]
+
+def assinatura_dados(path=DATASET_PATH):
+    # Versão do dataset (CSV + deltas) e o mtime mais recente entre os arquivos; é a chave
+    # de todos os caches, então um delta novo é visto pelas sessões já abertas no próximo rerun
+    mtime_ns, digest = assinatura_arquivo(path)
+    digests = []
+    for caminho in caminhos_deltas(path):
+        mtime_delta, digest_delta = assinatura_arquivo(caminho)
+        mtime_ns = max(mtime_ns, mtime_delta)
+        digests.append(digest_delta)
+    return mtime_ns, digest_versao(digest, digests)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _carregar_dados(path, mtime_ns, digest):
+    _, csv_digest = assinatura_arquivo(path)
+    return carregar_snapshot(path, csv_digest, deltas_dados(path))
+
+# Último agregado construído de cada tipo, com a versão, para a próxima versão partir dele
+_agregados = {}
+
+def _agregado(tipo, path, digest, construir, atualizar):
+    # Se o build (utils.build) já gerou os agregados desta versão, usa os dele. Senão, se esta
+    # versão veio de deltas aplicados sobre a versão do último agregado (neste processo ou pela
+    # CLI de ingestão), atualiza uma cópia dele só com as linhas removidas/adicionadas; senão
+    # constrói do zero
+    gerados = ler_agregados(path, digest)
+    objeto = gerados[tipo] if gerados else None
+    anterior = _agregados.get(tipo)
+    mudanca = atualizacao(path, digest)
+    if objeto is None and anterior is not None and mudanca is not None and anterior[0] == mudanca.anterior:
+        objeto = atualizar(anterior[1], mudanca)
+    if objeto is None:
+        objeto = construir()
+    _agregados[tipo] = (digest, objeto)
+    return objeto
+
+def carregar_dados(path=DATASET_PATH):
+    # O pipeline roda uma vez por processo e é refeito só quando o mtime/hash do CSV mudam;
+    # a leitura vem do snapshot colunar, reconstruído a partir do CSV quando necessário.
+    # O DataFrame é o mesmo objeto para todas as sessões (cache_resource, sem cópia por chamada)
+    # e é somente leitura: as páginas filtram por posições de linha (ParticoesPaises.linhas)
+    mtime_ns, digest = assinatura_dados(path)
+    return _carregar_dados(path, mtime_ns, digest)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _carregar_indice_culinarias(path, mtime_ns, digest):
+    return IndiceCulinarias(_carregar_dados(path, mtime_ns, digest)['Cuisines'])
+
+def carregar_indice_culinarias(path=DATASET_PATH):
+    # Índice somente leitura, construído uma vez por versão do dataset e compartilhado entre sessões
+    mtime_ns, digest = assinatura_dados(path)
+    return _carregar_indice_culinarias(path, mtime_ns, digest)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _carregar_cubo_paises(path, mtime_ns, digest):
+    df = _carregar_dados(path, mtime_ns, digest)
+    return _agregado(
+        'cubo_paises', path, digest,
+        lambda: CuboPaises(df),
+        lambda cubo, mudanca: cubo.atualizado(df, mudanca.removidas, mudanca.adicionadas)
+    )
+
+def carregar_cubo_paises(path=DATASET_PATH):
+    # Agregados por país, construídos uma vez por versão do dataset
+    mtime_ns, digest = assinatura_dados(path)
+    return _carregar_cubo_paises(path, mtime_ns, digest)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _carregar_cubo_culinarias(path, mtime_ns, digest):
+    df = _carregar_dados(path, mtime_ns, digest)
+    indice = _carregar_indice_culinarias(path, mtime_ns, digest)
+    return _agregado(
+        'cubo_culinarias', path, digest,
+        lambda: CuboCulinarias(df, indice),
+        lambda cubo, mudanca: cubo.atualizado(df, indice, mudanca.removidas, mudanca.adicionadas)
+    )
+
+def carregar_cubo_culinarias(path=DATASET_PATH):
+    # Somas e contagens por (país, culinária), construídas uma vez por versão do dataset
+    mtime_ns, digest = assinatura_dados(path)
+    return _carregar_cubo_culinarias(path, mtime_ns, digest)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _carregar_culinarias_cidades(path, mtime_ns, digest):
+    df = _carregar_dados(path, mtime_ns, digest)
+    indice = _carregar_indice_culinarias(path, mtime_ns, digest)
+    return _agregado(
+        'culinarias_cidades', path, digest,
+        lambda: CulinariasCidades(df, indice),
+        lambda culinarias, mudanca: culinarias.atualizado(df, indice, mudanca.removidas, mudanca.adicionadas)
+    )
+
+def carregar_culinarias_cidades(path=DATASET_PATH):
+    # Contagem de cada culinária por (país, cidade), construída uma vez por versão do dataset
+    mtime_ns, digest = assinatura_dados(path)
+    return _carregar_culinarias_cidades(path, mtime_ns, digest)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _carregar_ranking_restaurantes(path, mtime_ns, digest):
+    return RankingRestaurantes(
+        _carregar_dados(path, mtime_ns, digest),
+        _carregar_indice_culinarias(path, mtime_ns, digest)
+    )
+
+def carregar_ranking_restaurantes(path=DATASET_PATH):
+    # Notas ponderadas e listas por culinária já ordenadas, construídas uma vez por versão do dataset
+    mtime_ns, digest = assinatura_dados(path)
+    return _carregar_ranking_restaurantes(path, mtime_ns, digest)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _carregar_particoes_paises(path, mtime_ns, digest):
+    return ParticoesPaises(_carregar_dados(path, mtime_ns, digest))
+
+def carregar_particoes_paises(path=DATASET_PATH):
+    # Intervalos de linhas de cada país no DataFrame tratado
+    mtime_ns, digest = assinatura_dados(path)
+    return _carregar_particoes_paises(path, mtime_ns, digest)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _carregar_indice_espacial(path, mtime_ns, digest):
+    df = _carregar_dados(path, mtime_ns, digest)
+    return IndiceGrade(df['Latitude'], df['Longitude'])
+
+def carregar_indice_espacial(path=DATASET_PATH):
+    # Índice em grade das coordenadas dos restaurantes
+    mtime_ns, digest = assinatura_dados(path)
+    return _carregar_indice_espacial(path, mtime_ns, digest)
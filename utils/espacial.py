@@ -0,0 +1,176 @@
+import numpy as np
+
+from utils.culinarias import MODO_OU
+
+# Raio médio da Terra, em km
+RAIO_TERRA_KM = 6371.0088
+
+#============================================================
+# Distâncias
+#============================================================
+
+def haversine(latitude, longitude, latitudes, longitudes):
+    # Distância em km de um ponto até vários pontos (fórmula de haversine)
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def retangulo_raio(latitude, longitude, km):
+    # Retângulo (sul, oeste, norte, leste) que contém o círculo de `km` em volta do ponto
+    delta_lat = np.degrees(km / RAIO_TERRA_KM)
+    sul, norte = latitude - delta_lat, latitude + delta_lat
+    if sul <= -90 or norte >= 90:
+        # O círculo contém um polo: todas as longitudes
+        return max(sul, -90), -180, min(norte, 90), 180
+    delta_lon = np.degrees(np.arcsin(min(np.sin(km / RAIO_TERRA_KM) / np.cos(np.radians(latitude)), 1.0)))
+    if delta_lon >= 180 or km >= np.pi * RAIO_TERRA_KM / 2:
+        return sul, -180, norte, 180
+    oeste, leste = longitude - delta_lon, longitude + delta_lon
+    # Longitudes fora de [-180, 180] dão a volta (oeste > leste = cruza o antimeridiano)
+    return sul, (oeste + 180) % 360 - 180, norte, (leste + 180) % 360 - 180
+
+def filtro_restaurantes(df, indice_culinarias, selecionadas=None, culinarias=None, modo_culinarias=MODO_OU,
+                        tipos_preco=None, nota_minima=None):
+    # Filtro para as consultas espaciais: recebe linhas candidatas e devolve a máscara das que passam.
+    # selecionadas: máscara booleana (todas as linhas) da seleção de países.
+    notas = df['Aggregate rating'].to_numpy()
+    tipos = df['Cuisines Category Type']
+
+    def filtro(linhas):
+        mascara = np.ones(len(linhas), dtype=bool) if selecionadas is None else selecionadas[linhas]
+        if culinarias:
+            mascara &= indice_culinarias.contem(culinarias, linhas, modo_culinarias)
+        if tipos_preco:
+            mascara &= np.isin(tipos.cat.codes.to_numpy()[linhas], [tipos.cat.categories.get_loc(tipo) for tipo in tipos_preco])
+        if nota_minima:
+            mascara &= notas[linhas] >= nota_minima
+        return mascara
+
+    return filtro
+
+#============================================================
+# Índice espacial em grade
+#============================================================
+
+def concatenar_intervalos(inicios, fins):
+    # np.concatenate([np.arange(i, f) for i, f in zip(inicios, fins)]) sem o laço em Python
+    tamanhos = np.maximum(fins - inicios, 0)
+    deslocamentos = np.arange(tamanhos.sum()) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+    return np.repeat(inicios, tamanhos) + deslocamentos
+
+class IndiceGrade:
+    # Restaurantes ordenados pela coluna de uma grade de `resolucao` graus de longitude e, dentro da
+    # coluna, pela latitude. Assim, os restaurantes de uma coluna dentro de uma faixa de latitudes
+    # formam um único intervalo contíguo, achado por busca binária (em todas as colunas de uma vez,
+    # pela chave coluna * 360 + latitude), e uma consulta por retângulo visita no máximo uma fatia
+    # por coluna antes do filtro exato pelas coordenadas.
+
+    def __init__(self, latitude, longitude, resolucao=1.0):
+        latitude = np.clip(np.asarray(latitude, dtype=np.float64), -90, 90)
+        longitude = np.clip(np.asarray(longitude, dtype=np.float64), -180, 180)
+
+        self.resolucao = resolucao
+        self.n_lon = int(np.ceil(360 / resolucao))
+
+        colunas = self._coluna(longitude)
+        self.ordem = np.lexsort((latitude, colunas))
+        self.latitude = latitude[self.ordem]
+        self.longitude = longitude[self.ordem]
+        self.chaves = self._chave(colunas[self.ordem], self.latitude)
+
+    def _coluna(self, longitude):
+        return np.minimum(((np.asarray(longitude) + 180) // self.resolucao).astype(np.int64), self.n_lon - 1)
+
+    def _chave(self, colunas, latitude):
+        # Crescente na coluna e, dentro dela, na latitude; o arredondamento é monótono, então uma
+        # latitude dentro da faixa nunca fica fora do intervalo (no máximo entra uma a mais na borda)
+        return colunas * 360.0 + (latitude + 90)
+
+    def _faixas(self, sul, oeste, norte, leste):
+        # Colunas que cruzam o retângulo (sem cruzar o antimeridiano) e, para cada uma, as posições
+        # [inicio, fim), nos arrays ordenados, dos restaurantes da coluna com latitude entre sul e norte
+        colunas = np.arange(self._coluna(oeste), self._coluna(leste) + 1)
+        inicios = np.searchsorted(self.chaves, self._chave(colunas, max(sul, -90)), side='left')
+        fins = np.searchsorted(self.chaves, self._chave(colunas, min(norte, 90)), side='right')
+        return colunas, inicios, fins
+
+    def consultar(self, sul, oeste, norte, leste):
+        # Posições (no DataFrame tratado) dos restaurantes dentro do retângulo.
+        # oeste > leste indica um retângulo que cruza o antimeridiano.
+        sul, norte = max(sul, -90), min(norte, 90)
+        if oeste > leste:
+            return np.concatenate([self.consultar(sul, oeste, norte, 180), self.consultar(sul, -180, norte, leste)])
+        oeste, leste = max(oeste, -180), min(leste, 180)
+        if sul > norte or oeste > leste:
+            return np.array([], dtype=np.int64)
+
+        _, inicios, fins = self._faixas(sul, oeste, norte, leste)
+        candidatos = concatenar_intervalos(inicios, fins)
+        dentro = (
+            (self.latitude[candidatos] >= sul) & (self.latitude[candidatos] <= norte)
+            & (self.longitude[candidatos] >= oeste) & (self.longitude[candidatos] <= leste)
+        )
+        return self.ordem[candidatos[dentro]]
+
+    def _posicoes_ordenadas(self, linhas):
+        # Posição, nos arrays ordenados do índice, de cada linha do DataFrame
+        if not hasattr(self, '_inversa'):
+            self._inversa = np.empty_like(self.ordem)
+            self._inversa[self.ordem] = np.arange(len(self.ordem))
+        return self._inversa[linhas]
+
+    def distancias(self, latitude, longitude, linhas):
+        posicoes = self._posicoes_ordenadas(linhas)
+        return haversine(latitude, longitude, self.latitude[posicoes], self.longitude[posicoes])
+
+    def raio(self, latitude, longitude, km, filtro=None):
+        # Restaurantes a até `km` do ponto, do mais próximo ao mais distante: (linhas, distâncias).
+        # `filtro` recebe as linhas candidatas e devolve uma máscara booleana.
+        linhas = self.consultar(*retangulo_raio(latitude, longitude, km))
+        if filtro is not None:
+            linhas = linhas[filtro(linhas)]
+        distancias = self.distancias(latitude, longitude, linhas)
+        dentro = distancias <= km
+        linhas, distancias = linhas[dentro], distancias[dentro]
+        ordem = np.argsort(distancias, kind='stable')
+        return linhas[ordem], distancias[ordem]
+
+    def vizinhos(self, latitude, longitude, k, filtro=None, km_inicial=1.0):
+        # Os k restaurantes mais próximos: o raio da busca cresce até haver k restaurantes dentro dele.
+        # Como a faixa de latitudes de cada coluna só cresce com o raio, cada passo lê, filtra e mede
+        # apenas as pontas novas de cada faixa: nenhum restaurante é visto duas vezes, e o raio pode
+        # crescer devagar (1,5x), sem ler muito além do k-ésimo.
+        # Qualquer ponto mais próximo que o k-ésimo também estaria dentro do raio, então o resultado é exato.
+        lido_inicio = np.zeros(self.n_lon, dtype=np.int64)
+        lido_fim = np.zeros(self.n_lon, dtype=np.int64)
+        lida = np.zeros(self.n_lon, dtype=bool)
+        linhas, distancias = np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+        km = km_inicial
+        while True:
+            sul, oeste, norte, leste = retangulo_raio(latitude, longitude, km)
+            retangulos = [(oeste, 180), (-180, leste)] if oeste > leste else [(oeste, leste)]
+            colunas, inicios, fins = (np.concatenate(partes) for partes in zip(*(self._faixas(sul, o, norte, l) for o, l in retangulos)))
+            # Colunas novas são lidas inteiras; nas já lidas, só o que ficou fora de [lido_inicio, lido_fim)
+            ja_lidas = lida[colunas]
+            ate = np.where(ja_lidas, lido_inicio[colunas], fins)
+            desde = np.where(ja_lidas, lido_fim[colunas], fins)
+            posicoes = np.concatenate([concatenar_intervalos(inicios, ate), concatenar_intervalos(desde, fins)])
+            lido_inicio[colunas], lido_fim[colunas], lida[colunas] = inicios, fins, True
+
+            candidatas = self.ordem[posicoes]
+            if filtro is not None:
+                passam = filtro(candidatas)
+                posicoes, candidatas = posicoes[passam], candidatas[passam]
+            linhas = np.concatenate([linhas, candidatas])
+            distancias = np.concatenate([distancias, haversine(latitude, longitude, self.latitude[posicoes], self.longitude[posicoes])])
+
+            dentro = np.flatnonzero(distancias <= km)
+            if len(dentro) >= k or km >= np.pi * RAIO_TERRA_KM:
+                if len(dentro) > k:
+                    dentro = dentro[np.argpartition(distancias[dentro], k - 1)[:k]]
+                # Empates na distância saem na ordem das linhas
+                ordem = dentro[np.lexsort((linhas[dentro], distancias[dentro]))]
+                return linhas[ordem], distancias[ordem]
+            # Com k candidatos já lidos, o raio até o k-ésimo basta; senão, cresce 1,5x
+            km = np.partition(distancias, k - 1)[k - 1] if len(distancias) >= k else km * 1.5
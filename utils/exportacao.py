@@ -0,0 +1,125 @@
+import gzip
+import io
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.cache import CacheLRU
+from utils.data import DATASET_PATH, assinatura_dados, carregar_dados, carregar_particoes_paises
+
+# Linhas serializadas por vez: o arquivo nunca é montado como uma única string
+TAMANHO_BLOCO = 10_000
+
+# Orçamento do cache de arquivos exportados, medido pelos bytes de cada arquivo
+MAX_BYTES_EXPORTACOES = 64 * 1024 * 1024
+
+#============================================================
+# Escritores (todos em blocos de TAMANHO_BLOCO linhas)
+#============================================================
+
+def _blocos(df, tamanho_bloco):
+    # Fatias de linhas do df; um df vazio ainda gera um bloco (para o cabeçalho/schema)
+    for inicio in range(0, max(len(df), 1), tamanho_bloco):
+        yield inicio, df.iloc[inicio:inicio + tamanho_bloco]
+
+def escrever_csv(df, destino, tamanho_bloco=TAMANHO_BLOCO):
+    # O primeiro bloco leva o cabeçalho
+    for inicio, bloco in _blocos(df, tamanho_bloco):
+        destino.write(bloco.to_csv(index=False, header=inicio == 0).encode())
+
+def escrever_csv_gzip(df, destino, tamanho_bloco=TAMANHO_BLOCO):
+    with gzip.GzipFile(fileobj=destino, mode='wb') as comprimido:
+        escrever_csv(df, comprimido, tamanho_bloco)
+
+def escrever_parquet(df, destino, tamanho_bloco=TAMANHO_BLOCO):
+    # Cada bloco vira um row group; as colunas categóricas continuam dicionarizadas
+    writer = None
+    for _, bloco in _blocos(df, tamanho_bloco):
+        table = pa.Table.from_pandas(bloco, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(destino, table.schema, compression='zstd')
+        writer.write_table(table)
+    writer.close()
+
+def escrever_ndjson(df, destino, tamanho_bloco=TAMANHO_BLOCO):
+    # Um objeto JSON por linha
+    for _, bloco in _blocos(df, tamanho_bloco):
+        if len(bloco):
+            destino.write(bloco.to_json(orient='records', lines=True, force_ascii=False).encode())
+
+# formato -> (rótulo, extensão, mime, escritor)
+FORMATOS = {
+    'csv': ('CSV', '.csv', 'text/csv', escrever_csv),
+    'csv.gz': ('CSV (gzip)', '.csv.gz', 'application/gzip', escrever_csv_gzip),
+    'parquet': ('Parquet', '.parquet', 'application/vnd.apache.parquet', escrever_parquet),
+    'ndjson': ('JSON Lines', '.jsonl', 'application/x-ndjson', escrever_ndjson),
+}
+
+#============================================================
+# Exportação
+#============================================================
+
+def assinatura_filtro(selected_countries):
+    # Seleção normalizada: a ordem de escolha no multiselect não importa
+    return tuple(sorted(selected_countries))
+
+@st.cache_resource(max_entries=1)
+def _cache_exportacoes(digest):
+    # Um cache por versão do dataset, compartilhado entre sessões. Guarda os bytes prontos: um
+    # acerto devolve o mesmo objeto, sem a cópia (pickle) que o st.cache_data faz a cada leitura
+    return CacheLRU(MAX_BYTES_EXPORTACOES, tamanho=len)
+
+def _exportar(paises, formato):
+    with st.spinner('Gerando arquivo...'):
+        df_filtered = carregar_particoes_paises().selecionar(carregar_dados(), list(paises))
+        destino = io.BytesIO()
+        FORMATOS[formato][3](df_filtered, destino)
+        # O BytesIO é descartado: getvalue() entrega o próprio buffer, sem copiar
+        return destino.getvalue()
+
+def exportar(selected_countries, formato='csv', path=DATASET_PATH):
+    # Arquivo dos países escolhidos, cacheado pela assinatura do filtro, formato e versão do dataset
+    _, digest = assinatura_dados(path)
+    paises = assinatura_filtro(selected_countries)
+    chave = (digest, paises, formato)
+    grande = st.session_state.get('download_grande')
+    if grande is not None and grande[0] == chave:
+        return grande[1]
+    cache = _cache_exportacoes(digest)
+    dados = cache.obter((paises, formato), lambda: _exportar(paises, formato))
+    if (paises, formato) not in cache:
+        # Maior que o orçamento do cache: o arquivo fica só na sessão que o pediu (o último
+        # desses), para os reruns seguintes não o serializarem de novo
+        st.session_state['download_grande'] = (chave, dados)
+    return dados
+
+#============================================================
+# Barra lateral
+#============================================================
+
+def botao_download(selected_countries, file_name='data.csv'):
+    formato = st.sidebar.selectbox(
+        'Formato',
+        options=list(FORMATOS),
+        format_func=lambda formato: FORMATOS[formato][0]
+    )
+    _, extensao, mime, _ = FORMATOS[formato]
+
+    # O arquivo só é gerado quando o usuário pede; até lá a barra lateral não serializa nada.
+    # O pedido vale para a seleção e o formato atuais: mudou algum, volta a pedir.
+    assinatura = (assinatura_filtro(selected_countries), formato)
+    if st.session_state.get('download_pedido') != assinatura:
+        # O arquivo grande de um pedido anterior não é mais servido
+        st.session_state.pop('download_grande', None)
+        if not st.sidebar.button('Preparar download'):
+            return
+        st.session_state['download_pedido'] = assinatura
+
+    st.sidebar.download_button(
+        label="Download",
+        data=exportar(selected_countries, formato),
+        file_name=os.path.splitext(file_name)[0] + extensao,
+        mime=mime
+    )
@@ -0,0 +1,89 @@
+import plotly.express as px
+import plotly.io as pio
+import streamlit as st
+
+from utils.agregados import selecionar_top
+from utils.cache import CacheLRU
+from utils.data import DATASET_PATH, assinatura_dados
+
+# Orçamento do cache de gráficos, medido pelo JSON serializado de cada figura
+MAX_BYTES_GRAFICOS = 64 * 1024 * 1024
+
+#============================================================
+# Cache de figuras Plotly
+#============================================================
+
+def tamanho_figura(fig):
+    # Bytes do JSON que o Streamlit envia ao navegador para esta figura
+    return len(pio.to_json(fig, validate=False))
+
+def assinatura_grafico(selected_countries, *extras):
+    # Filtro normalizado (ordem de escolha não importa) mais o que mais o gráfico depender
+    return (tuple(sorted(selected_countries)),) + tuple(extras)
+
+@st.cache_resource(max_entries=1)
+def _cache_graficos(digest):
+    # Um cache por versão do dataset, compartilhado entre sessões; as figuras são só lidas
+    return CacheLRU(MAX_BYTES_GRAFICOS, tamanho=tamanho_figura)
+
+def grafico(key, assinatura, construir, path=DATASET_PATH):
+    # Exibe o gráfico `key` do filtro `assinatura`; construir() (agregação + px) só roda na falta.
+    # Guarda a go.Figure pronta: o st.plotly_chart revalida dicts/JSON, mas não figuras já construídas
+    _, digest = assinatura_dados(path)
+    fig = _cache_graficos(digest).obter((key, assinatura), construir)
+    st.plotly_chart(fig, use_container_width=True, key=key)
+
+#============================================================
+# Gráficos de barras declarativos
+#============================================================
+# Cada spec é um dict com:
+#   key        key do st.plotly_chart (e do cache)
+#   titulo     título do gráfico
+#   dimensao   coluna do eixo x
+#   medida     coluna do eixo y
+#   rotulos    (rótulo do eixo x, rótulo do eixo y)
+#   escala     escala de cores contínua
+#   top        quantas barras mostrar (None = todas); seleção parcial, empates na ordem da tabela
+#   crescente  ordem das barras (padrão: decrescente)
+#   casas      casas decimais (None = sem arredondar)
+#   folga      fator do limite do eixo y sobre o maior valor (padrão: 1.2)
+
+def figura_barras(spec, tabela):
+    dimensao, medida = spec['dimensao'], spec['medida']
+    df_aux = tabela[[dimensao, medida]]
+    if spec.get('top'):
+        df_aux = df_aux.iloc[selecionar_top(df_aux[medida], spec['top'], spec.get('crescente', False))]
+    else:
+        df_aux = df_aux.sort_values(by=medida, ascending=spec.get('crescente', False))
+    if spec.get('casas') is not None:
+        df_aux = df_aux.round(spec['casas'])
+    fig = px.bar(df_aux, x=dimensao, y=medida,
+                 title=spec['titulo'],
+                 labels=dict(zip((dimensao, medida), spec['rotulos'])),
+                 color=medida,  # Usa a própria medida para gradiente de cor
+                 color_continuous_scale=spec['escala'])
+    fig.update_layout(
+        xaxis={'tickangle': 45},  # Rotacionar rótulos do eixo x
+        yaxis=dict(range=[0, df_aux[medida].max() * spec.get('folga', 1.2)]),  # Ajustar limite do eixo y
+        showlegend=False  # Remover legenda, pois a cor é apenas ilustrativa
+    )
+    # Adicionar valores nas barras
+    fig.update_traces(text=df_aux[medida], textposition='auto')
+    return fig
+
+def figuras_barras(specs, assinatura, dados, path=DATASET_PATH):
+    # Figuras de todos os specs de uma página (key -> go.Figure). dados() devolve a tabela já
+    # agregada da página (uma linha por valor da dimensão, uma coluna por medida); só é chamado,
+    # uma vez, se faltar alguma figura no cache.
+    _, digest = assinatura_dados(path)
+    cache = _cache_graficos(digest)
+    figuras = {spec['key']: cache.get((spec['key'], assinatura)) for spec in specs}
+    faltando = [spec for spec in specs if figuras[spec['key']] is None]
+    if faltando:
+        tabela = dados()
+        for spec in faltando:
+            figuras[spec['key']] = cache.set((spec['key'], assinatura), figura_barras(spec, tabela))
+    return figuras
+
+def exibir_grafico(figuras, key):
+    st.plotly_chart(figuras[key], use_container_width=True, key=key)
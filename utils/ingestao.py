@@ -0,0 +1,157 @@
+import argparse
+import hashlib
+import os
+import pickle
+import shutil
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from utils.limpeza import TAMANHO_LOTE, particionar_por_pais, tipar_colunas, tratar_dados
+
+# Arquivos de delta (mesmo formato do zomato.csv) ficam em dataset/deltas e são aplicados em ordem de nome
+PASTA_DELTAS = 'deltas'
+CHAVE_RESTAURANTE = 'Restaurant ID'
+
+# Última atualização incremental do snapshot, ao lado dele: dataset/zomato.csv -> dataset/zomato.atualizacao.pkl
+SUFIXO_ATUALIZACAO = '.atualizacao.pkl'
+Atualizacao = namedtuple('Atualizacao', ['anterior', 'removidas', 'adicionadas'])
+
+# Última atualização lida neste processo: (caminho, versão, atualização)
+_lida = (None, None, None)
+
+#============================================================
+# Versões
+#============================================================
+
+def pasta_deltas(csv_path):
+    return os.path.join(os.path.dirname(csv_path), PASTA_DELTAS)
+
+def caminhos_deltas(csv_path):
+    pasta = pasta_deltas(csv_path)
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(os.path.join(pasta, nome) for nome in os.listdir(pasta) if nome.endswith('.csv'))
+
+def digest_versao(csv_digest, digests_deltas):
+    # Versão do dataset: o próprio hash do CSV, ou o encadeamento dele com o hash de cada delta
+    if not digests_deltas:
+        return csv_digest
+    sha = hashlib.sha256(csv_digest.encode())
+    for digest in digests_deltas:
+        sha.update(digest.encode())
+    return sha.hexdigest()
+
+#============================================================
+# Aplicação de deltas
+#============================================================
+
+def ler_delta(path):
+    # Mesmo tratamento do CSV completo; um restaurante repetido no delta vale pela última linha.
+    # As repetidas caem antes do tratamento, que reagrupa as linhas por país: depois dele, a
+    # "última" de um restaurante que mudou de país seria a do último bloco, não a do arquivo.
+    bruto = pd.read_csv(path, sep=',')
+    return tratar_dados(bruto.drop_duplicates(subset=CHAVE_RESTAURANTE, keep='last'))
+
+def validar_delta(path, csv_path):
+    # Confere um delta antes de ele entrar em dataset/deltas: as colunas do CSV, na mesma ordem
+    # (as derivadas são inseridas por posição), e número onde o CSV tem número (int ou float, os
+    # tipos são alargados na junção). Retorna o delta tratado; ValueError se não puder ser aplicado.
+    esperados = pd.read_csv(csv_path, sep=',', nrows=TAMANHO_LOTE).dtypes
+    bruto = pd.read_csv(path, sep=',')
+    if list(bruto.columns) != list(esperados.index):
+        faltam = [coluna for coluna in esperados.index if coluna not in bruto.columns]
+        sobram = [coluna for coluna in bruto.columns if coluna not in esperados.index]
+        raise ValueError(f'O delta deve ter as colunas do CSV, na mesma ordem (faltam {faltam}, sobram {sobram})')
+    nao_numericas = [
+        coluna for coluna, dtype in esperados.items()
+        if dtype.kind in 'iuf' and bruto[coluna].dtype.kind not in 'iuf'
+    ]
+    if nao_numericas:
+        raise ValueError(f'Colunas numéricas com valores não numéricos no delta: {nao_numericas}')
+    delta = ler_delta(path)
+    if not len(delta):
+        raise ValueError('O delta não tem nenhuma linha válida (sem nulos e de um país conhecido)')
+    return delta
+
+def juntar_deltas(deltas):
+    # Restaurantes de todos os deltas; um restaurante presente em mais de um vale pela última versão
+    return pd.concat(deltas, ignore_index=True).drop_duplicates(subset=CHAVE_RESTAURANTE, keep='last')
+
+def aplicar_deltas(df, deltas):
+    # Substitui (ou inclui) os restaurantes dos deltas pelo 'Restaurant ID' e refaz as partições por país.
+    # Retorna o novo DataFrame e as linhas removidas/adicionadas, para atualizar os agregados.
+    if not deltas:
+        return df, df.iloc[:0], df.iloc[:0]
+    novas = juntar_deltas(deltas)
+    alteradas = df[CHAVE_RESTAURANTE].isin(novas[CHAVE_RESTAURANTE])
+
+    removidas = df[alteradas]
+    novo = pd.concat([df[~alteradas], novas], ignore_index=True)
+    novo = tipar_colunas(particionar_por_pais(novo))
+    adicionadas = novo[novo[CHAVE_RESTAURANTE].isin(novas[CHAVE_RESTAURANTE])]
+    return novo, removidas, adicionadas
+
+def caminho_atualizacao(csv_path):
+    return os.path.splitext(csv_path)[0] + SUFIXO_ATUALIZACAO
+
+def registrar_atualizacao(csv_path, versao, anterior, removidas, adicionadas):
+    # Grava em disco como esta versão saiu da anterior: o delta pode ter sido aplicado por outro
+    # processo (a CLI de ingestão), e o servidor, com os agregados da anterior, parte deles.
+    # Escrita atômica, como a do snapshot; só a última atualização fica guardada.
+    global _lida
+    path = caminho_atualizacao(csv_path)
+    gravada = Atualizacao(anterior, removidas, adicionadas)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'versao': versao, 'atualizacao': gravada}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    _lida = (path, versao, gravada)
+
+def atualizacao(csv_path, versao):
+    # Como esta versão foi gerada a partir da anterior, ou None se ela não veio da última
+    # atualização incremental. O arquivo é gerado localmente (pickle não deve vir de fora).
+    global _lida
+    path = caminho_atualizacao(csv_path)
+    if _lida[:2] == (path, versao):
+        return _lida[2]
+    try:
+        with open(path, 'rb') as f:
+            gravada = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if gravada['versao'] != versao:
+        return None
+    _lida = (path, versao, gravada['atualizacao'])
+    return _lida[2]
+
+#============================================================
+# Ingestão
+#============================================================
+
+if __name__ == '__main__':
+    from utils.data import DATASET_PATH, assinatura_dados, carregar_dados
+
+    parser = argparse.ArgumentParser(description='Adiciona um arquivo de delta ao dataset e atualiza o snapshot.')
+    parser.add_argument('delta', help='CSV com restaurantes novos ou alterados (mesmas colunas do zomato.csv)')
+    parser.add_argument('--csv', default=DATASET_PATH)
+    args = parser.parse_args()
+
+    # Um delta inválido nunca chega a dataset/deltas (quebraria a próxima atualização de todas as sessões)
+    try:
+        delta = validar_delta(args.delta, args.csv)
+    except (OSError, ValueError) as erro:
+        parser.error(f'{args.delta}: {erro}')
+
+    # O nome com data/hora mantém a ordem de aplicação; a cópia é atômica para as sessões em execução
+    pasta = pasta_deltas(args.csv)
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, time.strftime('%Y%m%d-%H%M%S-') + os.path.basename(args.delta))
+    shutil.copyfile(args.delta, f'{destino}.tmp')
+    os.replace(f'{destino}.tmp', destino)
+
+    # Aplica já no snapshot, para a primeira sessão não pagar a atualização
+    df = carregar_dados(args.csv)
+    print(f'Delta {destino} aplicado ({len(delta)} restaurantes novos ou alterados): '
+          f'{len(df)} restaurantes na versão {assinatura_dados(args.csv)[1][:12]}')
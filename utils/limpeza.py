@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+
+COUNTRIES = {
+    1: "India",
+    14: "Australia",
+    30: "Brazil",
+    37: "Canada",
+    94: "Indonesia",
+    148: "New Zeland",
+    162: "Philippines",
+    166: "Qatar",
+    184: "Singapure",
+    189: "South Africa",
+    191: "Sri Lanka",
+    208: "Turkey",
+    214: "United Arab Emirates",
+    215: "England",
+    216: "United States of America",
+}
+
+# Colunas de texto com poucos valores distintos, guardadas como categóricas
+COLUNAS_CATEGORICAS = [
+    'Country Name',
+    'City',
+    'Currency',
+    'Rating color',
+    'Rating text',
+    'Cuisines Category Type',
+]
+
+# Texto livre (muitos valores distintos), guardado em strings do Arrow em vez de objetos Python
+COLUNAS_TEXTO = [
+    'Restaurant Name',
+    'Address',
+    'Locality',
+    'Locality Verbose',
+    'Cuisines',
+]
+
+# Flags 0/1 e a faixa de preço (1..4), em int8
+COLUNAS_INT8 = [
+    'Has Table booking',
+    'Has Online delivery',
+    'Is delivering now',
+    'Switch to order menu',
+    'Price range',
+]
+
+# Coordenadas em float32: o passo é de 7,6e-6° entre 64° e 128° e de 1,5e-5° acima disso (até
+# ~1,7 m no equador), então o erro de arredondamento fica abaixo de ~0,85 m, suficiente para o mapa e as distâncias
+COLUNAS_COORDENADAS = ['Longitude', 'Latitude']
+
+STRING_DTYPE = pd.StringDtype('pyarrow')
+
+# Faixas de preço em ordem crescente; 'Price range' 1..3 mapeia direto, o resto é gourmet
+PRICE_TYPES = ['cheap', 'normal', 'expensive', 'gourmet']
+
+# Linhas por lote na leitura em streaming do CSV
+TAMANHO_LOTE = 50_000
+
+#============================================================
+# Funções
+#============================================================
+
+def _tabela_paises():
+    # Tabela indexada pelo 'Country Code' com o código da categoria (-1 = país desconhecido)
+    nomes = sorted(COUNTRIES.values())
+    tabela = np.full(max(COUNTRIES) + 1, -1, dtype=np.int8)
+    for codigo, nome in COUNTRIES.items():
+        tabela[codigo] = nomes.index(nome)
+    return tabela, pd.CategoricalDtype(nomes)
+
+_TABELA_PAISES, COUNTRY_DTYPE = _tabela_paises()
+PRICE_TYPE_DTYPE = pd.CategoricalDtype(PRICE_TYPES, ordered=True)
+
+def create_country_name(country_code):
+    codes = np.asarray(country_code)
+    validos = (codes >= 0) & (codes < len(_TABELA_PAISES))
+    category_codes = np.full(len(codes), -1, dtype=np.int8)
+    category_codes[validos] = _TABELA_PAISES[codes[validos]]
+    return pd.Categorical.from_codes(category_codes, dtype=COUNTRY_DTYPE)
+
+def create_price_type(price_range):
+    price_range = np.asarray(price_range)
+    category_codes = np.full(len(price_range), PRICE_TYPES.index('gourmet'), dtype=np.int8)
+    faixa_direta = (price_range >= 1) & (price_range <= 3)
+    category_codes[faixa_direta] = price_range[faixa_direta] - 1
+    return pd.Categorical.from_codes(category_codes, dtype=PRICE_TYPE_DTYPE)
+
+def paises_conhecidos(df):
+    # Máscara das linhas com 'Country Code' em COUNTRIES. As demais são descartadas no tratamento:
+    # sem nome de país, ficariam fora das partições, dos filtros e dos agregados por país.
+    return df['Country Code'].isin(list(COUNTRIES)).to_numpy()
+
+def derivar_colunas(df):
+    # Colunas derivadas por lookup vetorizado, inseridas já na posição final (sem reordenar o frame)
+    df.insert(3, 'Country Name', create_country_name(df['Country Code']))
+    df.insert(11, 'Cuisines Category Type', create_price_type(df['Price range']))
+    return df
+
+def tratar_dados(df):
+    # Dropando valores nulos
+    df = df.dropna()
+
+    # Dropando valores duplicados
+    df = df.drop_duplicates()
+
+    # Dropando países desconhecidos
+    df = df[paises_conhecidos(df)]
+
+    # Resetando o índex
+    df.reset_index(drop=True, inplace=True)
+
+    # Adicionando colunas
+    df = derivar_colunas(df)
+
+    # Agrupando as linhas por país (partições contíguas)
+    return particionar_por_pais(df)
+
+def particionar_por_pais(df):
+    # Deixa cada país em um bloco contíguo de linhas. A ordenação é estável e os países
+    # seguem a ordem em que aparecem no CSV, então a ordem original muda o mínimo possível.
+    ordem_paises, _ = pd.factorize(df['Country Name'].cat.codes)
+    ordem = np.argsort(ordem_paises, kind='stable')
+    if (ordem != np.arange(len(ordem))).any():
+        df = df.take(ordem)
+        df.reset_index(drop=True, inplace=True)
+    return df
+
+def tipar_colunas(df, categorias=None):
+    # Tipos compactos: categóricas para as colunas repetitivas (menos memória, groupby mais rápido),
+    # strings do Arrow para o texto livre, int8 para as flags e float32 para as coordenadas.
+    # categorias: {coluna: categorias} já conhecidas (ex.: do dataset inteiro, ao tipar uma partição)
+    categorias = categorias or {}
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in categorias:
+            df[coluna] = pd.Categorical(df[coluna], categories=categorias[coluna])
+        elif not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    for colunas, dtype in ((COLUNAS_TEXTO, STRING_DTYPE), (COLUNAS_INT8, np.int8), (COLUNAS_COORDENADAS, np.float32)):
+        for coluna in colunas:
+            if df[coluna].dtype != dtype:
+                df[coluna] = df[coluna].astype(dtype)
+    return df
+
+#============================================================
+# Tratamento em streaming
+#============================================================
+
+class DigitaisVistas:
+    # Impressões digitais (hash de 64 bits de todas as colunas) das linhas já emitidas, em um
+    # array uint64 ordenado: 8 bytes por linha, consulta por searchsorted. Duas linhas diferentes
+    # só colidem com probabilidade ~n²/2⁶⁵ (desprezível mesmo com dezenas de milhões de linhas).
+
+    def __init__(self):
+        self.digitais = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.digitais)
+
+    def novas(self, digitais):
+        # Máscara das linhas ainda não vistas (só a primeira ocorrência dentro do lote), já registradas
+        digitais = np.asarray(digitais, dtype=np.uint64)
+        mascara = np.zeros(len(digitais), dtype=bool)
+        unicas, primeiras = np.unique(digitais, return_index=True)
+        posicoes = np.searchsorted(self.digitais, unicas)
+        if len(self):
+            vistas = self.digitais[np.minimum(posicoes, len(self) - 1)] == unicas
+        else:
+            vistas = np.zeros(len(unicas), dtype=bool)
+        mascara[primeiras[~vistas]] = True
+        # Intercala as novas no array ordenado (cópia linear, sem reordenar tudo)
+        self.digitais = np.insert(self.digitais, posicoes[~vistas], unicas[~vistas])
+        return mascara
+
+class ResumoLotes:
+    # Agregados parciais do pipeline em streaming, atualizados a cada lote: linhas lidas e
+    # descartadas, restaurantes, votos e soma das notas por país (na ordem em que aparecem) e
+    # os tipos das colunas do CSV
+
+    def __init__(self):
+        self.lotes = 0
+        self.lidas = 0
+        self.nulas = 0
+        self.duplicadas = 0
+        self.desconhecidas = 0
+        self.paises = {}
+        self.tipos = {}
+
+    def alargar_tipos(self, dtypes):
+        # Tipo de cada coluna em todos os lotes vistos. Só alarga (int64 com float64 dá float64),
+        # como o read_csv do arquivo inteiro inferiria; nunca converte um lote para um tipo menor.
+        for coluna, dtype in dtypes.items():
+            self.tipos[coluna] = np.result_type(self.tipos[coluna], dtype) if coluna in self.tipos else dtype
+
+    def acumular(self, lote):
+        por_pais = lote.groupby('Country Name', observed=True, sort=False).agg(
+            restaurantes=('Restaurant ID', 'size'),
+            votos=('Votes', 'sum'),
+            soma_notas=('Aggregate rating', 'sum'),
+        )
+        for pais, restaurantes, votos, soma_notas in por_pais.itertuples():
+            atual = self.paises.setdefault(pais, [0, 0, 0.0])
+            atual[0] += restaurantes
+            atual[1] += votos
+            atual[2] += soma_notas
+
+    @property
+    def restaurantes(self):
+        return sum(restaurantes for restaurantes, _, _ in self.paises.values())
+
+    def tabela(self):
+        tabela = pd.DataFrame.from_dict(self.paises, orient='index', columns=['Restaurants', 'Votes', 'Rating Sum'])
+        tabela['Mean Rating'] = tabela['Rating Sum'] / tabela['Restaurants']
+        return tabela.drop(columns='Rating Sum')
+
+def digitais_linhas(df):
+    # Hash de 64 bits de cada linha. Os números entram como float64, para a mesma linha ter a
+    # mesma digital num lote em que a coluna foi inferida como int64 e noutro como float64.
+    numericas = {coluna: np.float64 for coluna, dtype in df.dtypes.items() if dtype.kind in 'biuf'}
+    return pd.util.hash_pandas_object(df.astype(numericas), index=False).to_numpy()
+
+def tratar_em_lotes(csv_path, resumo, tamanho_lote=TAMANHO_LOTE):
+    # Mesmo tratamento de tratar_dados, lote a lote: nulos e países desconhecidos caem em cada
+    # lote e duplicadas entre lotes pelas impressões digitais, mantendo a primeira ocorrência
+    # como o drop_duplicates.
+    # Não particiona por país: isso exige ver o arquivo inteiro (ver utils.snapshot).
+    # Os tipos são inferidos por lote e cada lote sai com os seus; resumo.tipos guarda os de
+    # todos os lotes, alargados, para quem junta os lotes no fim.
+    vistas = DigitaisVistas()
+    with pd.read_csv(csv_path, sep=',', chunksize=tamanho_lote) as leitor:
+        for lote in leitor:
+            resumo.lotes += 1
+            resumo.lidas += len(lote)
+            # Antes do dropna, como no read_csv do arquivo inteiro (uma coluna int com nulos vira float)
+            resumo.alargar_tipos(lote.dtypes)
+            completo = lote.dropna()
+            resumo.nulas += len(lote) - len(completo)
+            conhecidas = paises_conhecidos(completo)
+            resumo.desconhecidas += len(completo) - int(conhecidas.sum())
+            completo = completo[conhecidas]
+
+            novas = vistas.novas(digitais_linhas(completo))
+            resumo.duplicadas += len(completo) - int(novas.sum())
+            yield derivar_colunas(completo[novas].reset_index(drop=True))
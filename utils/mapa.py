@@ -0,0 +1,216 @@
+import html
+import zlib
+
+import folium
+import numpy as np
+import pandas as pd
+import streamlit as st
+from folium.plugins import FastMarkerCluster
+
+from utils.cache import CacheLRU
+from utils.data import DATASET_PATH, assinatura_dados, carregar_dados, carregar_particoes_paises
+from utils.limpeza import COUNTRIES
+
+# Pirâmide de grades: no zoom z uma célula cobre PIXELS_POR_CELULA pixels de tela
+# (tiles de 256 px, mundo com 256 * 2**z px de largura)
+NIVEIS_ZOOM = range(0, 19)
+PIXELS_POR_CELULA = 40
+
+# Máximo de pontos enviados ao navegador; acima disso, usa o nível de zoom mais fino que caiba
+MAX_PONTOS = 2000
+
+# Máximo de pontos na camada de restaurantes (por área visível)
+MAX_PONTOS_VIEWPORT = 1000
+
+# Área usada antes de o mapa informar a área visível: o mundo todo
+AREA_INICIAL = (-90, -180, 90, 180)
+
+# Tamanho do mapa na Home
+LARGURA_MAPA = 1024
+ALTURA_MAPA = 600
+
+# Orçamento do cache de HTML dos mapas (compartilhado por todas as sessões)
+MAX_BYTES_MAPAS = 32 * 1024 ** 2
+
+# Seleções renderizadas assim que o cache é criado: todos os países e cada país isolado
+SELECOES_AQUECIMENTO = [tuple(sorted(COUNTRIES.values()))] + [(pais,) for pais in sorted(COUNTRIES.values())]
+
+# Cria os marcadores no navegador a partir de [lat, lon, popup]
+CALLBACK_MARCADOR = """function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(row[2]);
+    return marker;
+}"""
+
+#============================================================
+# Funções
+#============================================================
+
+def pontos_cidades(df_filtered):
+    # Agrupar por cidade e calcular a mediana de latitude e longitude
+    df_aux = (
+        df_filtered.loc[:, ['City', 'Country Name', 'Latitude', 'Longitude']]
+        .groupby(['City', 'Country Name'], observed=True)
+        .median()
+        .reset_index()
+    )
+    df_aux['Counts'] = 1
+    return df_aux
+
+def tamanho_celula(zoom):
+    # Lado da célula, em graus, no nível de zoom
+    return 360 / (256 * 2 ** zoom) * PIXELS_POR_CELULA
+
+def _celulas(pontos, zoom):
+    # Índice da célula de cada ponto na grade do zoom (0..n_celulas-1)
+    lado = tamanho_celula(zoom)
+    celula_x = np.floor((pontos['Longitude'].to_numpy() + 180) / lado).astype(np.int64)
+    celula_y = np.floor((pontos['Latitude'].to_numpy() + 90) / lado).astype(np.int64)
+    chaves, grupo = np.unique((celula_x << 32) + celula_y, return_inverse=True)
+    return grupo.ravel(), len(chaves)
+
+def agregar_grade(pontos, zoom):
+    # Junta os pontos que caem na mesma célula da grade do zoom: soma os pesos ('Counts'),
+    # posiciona a célula na média ponderada e lista as cidades no popup
+    if pontos.empty:
+        return pontos.assign(popup=pd.Series(dtype=object))[['Latitude', 'Longitude', 'popup', 'Counts']]
+
+    grupo, n_celulas = _celulas(pontos, zoom)
+    pesos = pontos['Counts'].to_numpy(dtype=np.float64)
+    soma_pesos = np.bincount(grupo, weights=pesos, minlength=n_celulas)
+    latitude = np.bincount(grupo, weights=pontos['Latitude'].to_numpy() * pesos, minlength=n_celulas) / soma_pesos
+    longitude = np.bincount(grupo, weights=pontos['Longitude'].to_numpy() * pesos, minlength=n_celulas) / soma_pesos
+
+    # Cidades distintas de cada célula, na ordem em que aparecem
+    rotulos = (
+        pd.DataFrame({'celula': grupo, 'City': pontos['City'].to_numpy(), 'Country Name': pontos['Country Name'].to_numpy()})
+        .drop_duplicates()
+        .groupby('celula')[['City', 'Country Name']]
+        .agg(list)
+    )
+    # Com pontos de restaurantes, a célula de um único restaurante mostra o nome dele
+    if 'Restaurant Name' in pontos:
+        restaurantes = pd.Series(pontos['Restaurant Name'].to_numpy()).groupby(grupo).first()
+        popups = [
+            _popup(cidades, paises, restaurante if total == 1 else None, total)
+            for cidades, paises, restaurante, total in zip(rotulos['City'], rotulos['Country Name'], restaurantes, soma_pesos)
+        ]
+    else:
+        popups = [_popup(cidades, paises) for cidades, paises in zip(rotulos['City'], rotulos['Country Name'])]
+
+    return pd.DataFrame({
+        'Latitude': latitude,
+        'Longitude': longitude,
+        'popup': popups,
+        'Counts': soma_pesos.astype(np.int64),
+    })
+
+def _popup(cidades, paises, restaurante=None, total=None, max_cidades=5):
+    cidades = [html.escape(cidade) for cidade in cidades]
+    paises = [html.escape(pais) for pais in paises]
+    if restaurante is not None:
+        return f"Restaurant: {html.escape(restaurante)}<br>City: {cidades[0]}<br>Country: {paises[0]}"
+    prefixo = f"Restaurants: {int(total)}<br>" if total is not None else ""
+    if len(cidades) == 1:
+        return f"{prefixo}City: {cidades[0]}<br>Country: {paises[0]}"
+    texto = ', '.join(cidades[:max_cidades])
+    if len(cidades) > max_cidades:
+        texto += f' (+{len(cidades) - max_cidades})'
+    return f"{prefixo}Cities: {texto}<br>Country: {', '.join(sorted(set(paises)))}"
+
+def pontos_limitados(pontos, max_pontos=MAX_PONTOS):
+    # Agrega no nível de zoom mais fino cuja grade tem no máximo max_pontos células
+    # (com poucos pontos, o nível mais fino praticamente devolve os próprios pontos)
+    for zoom in reversed(NIVEIS_ZOOM):
+        if _celulas(pontos, zoom)[1] <= max_pontos:
+            return agregar_grade(pontos, zoom)
+    return agregar_grade(pontos, NIVEIS_ZOOM[0])
+
+#============================================================
+# Renderização e cache do HTML
+#============================================================
+
+def renderizar_mapa(df_filtered):
+    # HTML completo do mapa (o mesmo que o folium_static geraria)
+    df_aux = pontos_cidades(df_filtered)
+    df_pontos = pontos_limitados(df_aux)
+
+    # Criar o mapa base centrado na média das coordenadas
+    map = folium.Map(location=[df_aux['Latitude'].mean(), df_aux['Longitude'].mean()], zoom_start=2)
+
+    # Uma única camada com os pontos em um array compacto; os marcadores são criados no navegador
+    FastMarkerCluster(
+        df_pontos[['Latitude', 'Longitude', 'popup']].values.tolist(),
+        callback=CALLBACK_MARCADOR
+    ).add_to(map)
+    return folium.Figure().add_child(map).render()
+
+def assinatura_selecao(selected_countries):
+    # Seleção normalizada: ordem não importa e seleção vazia equivale a todos os países
+    return tuple(sorted(selected_countries)) if selected_countries else SELECOES_AQUECIMENTO[0]
+
+def _renderizar_selecao(assinatura):
+    df_filtered = carregar_particoes_paises().selecionar(carregar_dados(), list(assinatura))
+    return renderizar_mapa(df_filtered)
+
+@st.cache_resource(show_spinner='Preparando os mapas...', max_entries=1)
+def _cache_mapas(digest):
+    # Um cache por versão do dataset, já aquecido com as seleções mais comuns
+    cache = CacheLRU(MAX_BYTES_MAPAS)
+    for assinatura in SELECOES_AQUECIMENTO:
+        cache.set(assinatura, _renderizar_selecao(assinatura))
+    return cache
+
+def mapa_html(selected_countries, path=DATASET_PATH):
+    _, digest = assinatura_dados(path)
+    assinatura = assinatura_selecao(selected_countries)
+    return _cache_mapas(digest).obter(assinatura, lambda: _renderizar_selecao(assinatura))
+
+#============================================================
+# Camada de restaurantes por área visível
+#============================================================
+
+def area_visivel(retorno):
+    # (sul, oeste, norte, leste) a partir do retorno do st_folium; None antes da primeira interação
+    try:
+        sudoeste, nordeste = retorno['bounds']['_southWest'], retorno['bounds']['_northEast']
+        sul, oeste, norte, leste = sudoeste['lat'], sudoeste['lng'], nordeste['lat'], nordeste['lng']
+    except (TypeError, KeyError):
+        return None
+    if None in (sul, oeste, norte, leste):
+        return None
+    # O Leaflet devolve longitudes fora de [-180, 180] quando o mapa é arrastado além do antimeridiano
+    if leste - oeste >= 360:
+        return sul, -180, norte, 180
+    return sul, (oeste + 180) % 360 - 180, norte, (leste + 180) % 360 - 180
+
+def linhas_visiveis(indice_espacial, linhas_filtradas, area):
+    # Restaurantes da seleção de países dentro da área (consulta no índice espacial)
+    linhas = indice_espacial.consultar(*area)
+    selecionadas = np.zeros(len(indice_espacial.ordem), dtype=bool)
+    selecionadas[linhas_filtradas] = True
+    return np.sort(linhas[selecionadas[linhas]])
+
+def camada_restaurantes(df, linhas, max_pontos=MAX_PONTOS_VIEWPORT):
+    # Uma camada GeoJSON com os restaurantes das linhas (agregados em grade se passarem do limite)
+    pontos = df.iloc[linhas][['Restaurant Name', 'City', 'Country Name', 'Latitude', 'Longitude']].assign(Counts=1)
+    df_pontos = pontos_limitados(pontos, max_pontos)
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [longitude, latitude]},
+            'properties': {'popup': popup},
+        }
+        for latitude, longitude, popup in zip(df_pontos['Latitude'], df_pontos['Longitude'], df_pontos['popup'])
+    ]
+    camada = folium.FeatureGroup(name='Restaurantes')
+    folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        popup=folium.GeoJsonPopup(fields=['popup'], labels=False)
+    ).add_to(camada)
+    return camada
+
+def chave_mapa_restaurantes(selected_countries):
+    # Um componente por seleção: ao trocar de países, o mapa volta para a visão inicial
+    assinatura = '|'.join(assinatura_selecao(selected_countries))
+    return f"mapa_restaurantes_{zlib.crc32(assinatura.encode())}"
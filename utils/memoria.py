@@ -0,0 +1,70 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils.cache import CacheLRU
+
+# Sessões lembradas pelo relatório (as mais recentes) e janela para considerar uma sessão ativa
+MAX_SESSOES = 1000
+SEGUNDOS_ATIVA = 30 * 60
+
+# Memória de cada sessão no último rerun: session_id -> registro
+_sessoes = CacheLRU(MAX_SESSOES, tamanho=lambda registro: 1)
+
+#============================================================
+# Medição
+#============================================================
+
+def bytes_objeto(objeto):
+    if isinstance(objeto, pd.DataFrame):
+        return int(objeto.memory_usage(index=False, deep=True).sum())
+    if isinstance(objeto, pd.Series):
+        return int(objeto.memory_usage(index=False, deep=True))
+    if isinstance(objeto, np.ndarray):
+        return objeto.nbytes
+    return sys.getsizeof(objeto)
+
+def tabela_colunas(df):
+    # Uma linha por coluna: tipo, bytes e fração do total
+    bytes_ = df.memory_usage(index=False, deep=True)
+    return pd.DataFrame({
+        'Column': df.columns,
+        'Dtype': df.dtypes.astype(str).to_numpy(),
+        'Bytes': bytes_.to_numpy(),
+        'Share (%)': (100 * bytes_ / bytes_.sum()).round(1).to_numpy(),
+    }).sort_values('Bytes', ascending=False, ignore_index=True)
+
+#============================================================
+# Registro por sessão
+#============================================================
+
+def registrar_sessao(pagina, **objetos):
+    # Chamado por cada página depois de montar seus dados: guarda os bytes que o rerun desta
+    # sessão segura além do que é compartilhado pelo processo (dataset, índices e agregados):
+    # os objetos passados (ex.: linhas do filtro) e o session_state
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    bytes_ = {nome: bytes_objeto(objeto) for nome, objeto in objetos.items()}
+    bytes_['session_state'] = sum(bytes_objeto(valor) for valor in st.session_state.to_dict().values())
+    _sessoes.set(ctx.session_id, {'pagina': pagina, 'bytes': bytes_, 'atualizada': time.time()})
+
+def tabela_sessoes():
+    # Sessões com rerun na janela de atividade, da mais recente para a mais antiga
+    limite = time.time() - SEGUNDOS_ATIVA
+    linhas = []
+    for session_id, registro in _sessoes.valores():
+        if registro['atualizada'] < limite:
+            continue
+        linhas.append({
+            'Session': session_id[:8],
+            'Page': registro['pagina'],
+            **{f'{nome} (bytes)': valor for nome, valor in registro['bytes'].items()},
+            'Total (bytes)': sum(registro['bytes'].values()),
+            'Last rerun': time.strftime('%H:%M:%S', time.localtime(registro['atualizada'])),
+        })
+    return pd.DataFrame(linhas[::-1])
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+#============================================================
+# Partições por país
+#============================================================
+
+class ParticoesPaises:
+    # Intervalos [inicio, fim) de cada país no DataFrame tratado, que guarda cada país
+    # em um bloco contíguo de linhas (ver limpeza.particionar_por_pais).
+    # Filtrar por país vira fatiar esses blocos: sem máscara booleana sobre todas as linhas
+    # e, quando os países escolhidos são vizinhos, sem cópia nenhuma (df.iloc devolve uma view).
+
+    def __init__(self, df):
+        codigos = df['Country Name'].cat.codes.to_numpy()
+        inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]]) if len(codigos) else np.array([], dtype=np.int64)
+        fins = np.append(inicios[1:], len(codigos))
+        nomes = df['Country Name'].cat.categories[codigos[inicios]]
+        if nomes.has_duplicates:
+            raise ValueError("O DataFrame não está particionado por 'Country Name'")
+
+        self.limites = {nome: (int(inicio), int(fim)) for nome, inicio, fim in zip(nomes, inicios, fins)}
+        self.n_linhas = len(codigos)
+
+    def intervalos(self, selected_countries):
+        # Intervalos dos países escolhidos, com os vizinhos já unidos
+        intervalos = []
+        for inicio, fim in sorted(self.limites[nome] for nome in selected_countries if nome in self.limites):
+            if intervalos and intervalos[-1][1] == inicio:
+                intervalos[-1][1] = fim
+            else:
+                intervalos.append([inicio, fim])
+        return intervalos
+
+    def linhas(self, selected_countries):
+        # Posições das linhas dos países escolhidos (seleção vazia = todas), sem tocar no DataFrame.
+        # As páginas filtram por posições: o dataset é compartilhado entre sessões e não é copiado.
+        if not selected_countries:
+            return np.arange(self.n_linhas)
+        intervalos = self.intervalos(selected_countries)
+        if not intervalos:
+            return np.array([], dtype=np.int64)
+        return np.concatenate([np.arange(inicio, fim) for inicio, fim in intervalos])
+
+    def selecionar(self, df, selected_countries):
+        # Seleção vazia = todos os países; o df base é só leitura, então não precisa de cópia
+        if not selected_countries:
+            return df
+        intervalos = self.intervalos(selected_countries)
+        if not intervalos:
+            return df.iloc[0:0]
+        if len(intervalos) == 1:
+            inicio, fim = intervalos[0]
+            return df.iloc[inicio:fim]
+        return pd.concat([df.iloc[inicio:fim] for inicio, fim in intervalos])
@@ -0,0 +1,130 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from utils.agregados import selecionar_top
+
+AGRUPAR_RESTAURANTE = 'restaurante'
+AGRUPAR_REDE = 'rede'
+
+#============================================================
+# Ranking de restaurantes por nota ponderada
+#============================================================
+
+class RankingRestaurantes:
+    # Nota bayesiana ponderada pelos votos: (votos * nota + m * C) / (votos + m), com
+    # C = nota média ponderada pelos votos de todo o dataset e m = mediana de votos.
+    # Restaurantes com poucos votos ficam perto de C em vez de dominar o topo.
+    # Construído uma vez: nota de cada restaurante, a lista de restaurantes de cada culinária
+    # já ordenada pela nota e os códigos de rede ('Restaurant Name') de cada linha.
+
+    def __init__(self, df, indice_culinarias):
+        self.votos = df['Votes'].to_numpy(dtype=np.float64)
+        self.soma_notas = self.votos * df['Aggregate rating'].to_numpy(dtype=np.float64)
+        self.media_global = self.soma_notas.sum() / self.votos.sum()
+        self.votos_minimos = float(np.median(self.votos))
+        self.nota_ponderada = self._ponderar(self.soma_notas, self.votos)
+
+        # Todas as linhas, e as linhas de cada culinária (em CSR), da maior para a menor nota;
+        # empates na ordem do DataFrame
+        self.ordem = np.argsort(-self.nota_ponderada, kind='stable')
+        linhas = indice_culinarias.linha_da_entrada
+        culinarias = indice_culinarias.indices
+        ordem = np.lexsort((-self.nota_ponderada[linhas], culinarias))
+        self.linhas_culinaria = linhas[ordem]
+        self.indptr_culinaria = np.zeros(len(indice_culinarias.vocabulario) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(culinarias, minlength=len(indice_culinarias.vocabulario)), out=self.indptr_culinaria[1:])
+        self.posicoes_culinaria = indice_culinarias.posicoes
+
+        # Redes: restaurantes com o mesmo nome, com os totais de todas as linhas (filtro vazio)
+        self.rede, self.redes = pd.factorize(df['Restaurant Name'])
+        self.totais_rede = self._totais_rede(np.arange(len(self.rede)))
+        self.unidades = self.totais_rede[0]
+
+    def _ponderar(self, soma_notas, votos):
+        return (soma_notas + self.votos_minimos * self.media_global) / (votos + self.votos_minimos)
+
+    def _mascara(self, linhas):
+        mascara = np.zeros(len(self.nota_ponderada), dtype=bool)
+        mascara[np.asarray(linhas)] = True
+        return mascara
+
+    def melhores(self, k, linhas, culinarias=None):
+        # Posições (no DataFrame) dos k restaurantes de maior nota ponderada entre as linhas.
+        # Com culinárias escolhidas, pega o top-k de cada lista já ordenada e junta as listas
+        # com um heap (heapq.merge), parando nos k primeiros distintos.
+        mascara = self._mascara(linhas)
+        if not culinarias:
+            return self.ordem[mascara[self.ordem]][:k]
+        # Culinárias que não existem no dataset não têm restaurantes
+        codigos = [self.posicoes_culinaria[nome] for nome in culinarias if nome in self.posicoes_culinaria]
+
+        listas = []
+        for codigo in codigos:
+            lista = self.linhas_culinaria[self.indptr_culinaria[codigo]:self.indptr_culinaria[codigo + 1]]
+            listas.append([(-self.nota_ponderada[linha], linha) for linha in lista[mascara[lista]][:k]])
+        melhores, vistas = [], set()
+        for _, linha in heapq.merge(*listas):
+            # Um restaurante de várias culinárias aparece em mais de uma lista
+            if linha in vistas:
+                continue
+            vistas.add(linha)
+            melhores.append(linha)
+            if len(melhores) == k:
+                break
+        return np.array(melhores, dtype=np.int64)
+
+    def tabela_restaurantes(self, df, k, linhas, culinarias=None):
+        posicoes = self.melhores(k, linhas, culinarias)
+        return pd.DataFrame({
+            'Restaurant Name': df['Restaurant Name'].to_numpy()[posicoes],
+            'Nota_Ponderada': self.nota_ponderada[posicoes].round(2),
+            'Nota_Media': df['Aggregate rating'].to_numpy()[posicoes],
+            'Total_Votos': df['Votes'].to_numpy()[posicoes],
+            'Unidades_Rede': self.unidades[self.rede[posicoes]],
+            'Country_Name': df['Country Name'].to_numpy()[posicoes],
+            'City': df['City'].to_numpy()[posicoes],
+            'Cuisines': df['Cuisines'].to_numpy()[posicoes],
+        })
+
+    def _totais_rede(self, linhas):
+        # Unidades, votos, soma das notas e primeira unidade (menor posição) de cada rede entre as
+        # linhas, por bincount e minimum.at sobre os códigos de rede: O(n), sem ordenar
+        rede = self.rede[linhas]
+        n_redes = len(self.redes)
+        primeira = np.full(n_redes, len(self.rede), dtype=np.int64)
+        np.minimum.at(primeira, rede, linhas)
+        return (
+            np.bincount(rede, minlength=n_redes),
+            np.bincount(rede, weights=self.votos[linhas], minlength=n_redes),
+            np.bincount(rede, weights=self.soma_notas[linhas], minlength=n_redes),
+            primeira,
+        )
+
+    def tabela_redes(self, df, k, linhas):
+        # Redes somando votos e notas das suas unidades entre as linhas (posições distintas); com
+        # todas as linhas, usa os totais pré-calculados
+        linhas = np.asarray(linhas)
+        if len(linhas) == len(self.rede):
+            unidades, votos, soma_notas, primeira = self.totais_rede
+        else:
+            unidades, votos, soma_notas, primeira = self._totais_rede(linhas)
+
+        presentes = np.flatnonzero(unidades > 0)
+        nota = self._ponderar(soma_notas[presentes], votos[presentes])
+        escolhidas = presentes[selecionar_top(nota, k)]
+        # Primeira unidade de cada rede escolhida, para país, cidade e culinárias
+        primeira = primeira[escolhidas]
+        with np.errstate(invalid='ignore'):
+            nota_media = soma_notas[escolhidas] / votos[escolhidas]
+        return pd.DataFrame({
+            'Restaurant Name': self.redes[escolhidas],
+            'Nota_Ponderada': self._ponderar(soma_notas[escolhidas], votos[escolhidas]).round(2),
+            'Nota_Media': nota_media.round(2),
+            'Total_Votos': votos[escolhidas].astype(np.int64),
+            'Unidades': unidades[escolhidas],
+            'Country_Name': df['Country Name'].to_numpy()[primeira],
+            'City': df['City'].to_numpy()[primeira],
+            'Cuisines': df['Cuisines'].to_numpy()[primeira],
+        })
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from utils.ingestao import CHAVE_RESTAURANTE, aplicar_deltas, digest_versao, juntar_deltas, ler_delta, registrar_atualizacao
+from utils.limpeza import COLUNAS_CATEGORICAS, STRING_DTYPE, ResumoLotes, TAMANHO_LOTE, tipar_colunas, tratar_em_lotes
+from utils.particoes import ParticoesPaises
+
+# Chave de metadado que guarda a versão do snapshot (hash do CSV, encadeado com o dos deltas aplicados)
+CHAVE_HASH = b'gourmet_quest.csv_sha256'
+# Chave de metadado com a origem da versão: {"csv": hash do CSV, "deltas": [hash de cada delta aplicado]}
+CHAVE_ORIGEM = b'gourmet_quest.origem'
+# Chave de metadado com as partições por país: [[país, inicio, fim], ...], intervalos de linhas do snapshot
+CHAVE_PARTICOES = b'gourmet_quest.particoes'
+
+# O texto livre volta do snapshot como strings do Arrow (sem copiar para objetos Python)
+TIPOS_PANDAS = {pa.string(): STRING_DTYPE, pa.large_string(): STRING_DTYPE}
+
+#============================================================
+# Funções
+#============================================================
+
+def para_pandas(table):
+    # O snapshot é um único record batch: cada coluna é um buffer contíguo do arquivo mapeado e,
+    # com um bloco por coluna (split_blocks), o pandas usa esses buffers sem copiar. Eles são
+    # somente leitura: uma escrita acidental no DataFrame compartilhado entre sessões levanta erro.
+    # tipar_colunas não faz nada nos snapshots atuais; converte os gerados antes dos tipos compactos
+    return tipar_colunas(table.to_pandas(types_mapper=TIPOS_PANDAS.get, split_blocks=True))
+
+def caminho_snapshot(csv_path):
+    # O snapshot fica ao lado do CSV: dataset/zomato.csv -> dataset/zomato.feather
+    return os.path.splitext(csv_path)[0] + '.feather'
+
+def metadados_snapshot(path):
+    # Lê apenas o schema (não carrega os dados)
+    try:
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return {}
+
+def hash_snapshot(path):
+    valor = metadados_snapshot(path).get(CHAVE_HASH)
+    return valor.decode() if valor else None
+
+def _schema_snapshot(schema, versao, csv_digest, digests_deltas, particoes):
+    # particoes: [(país, (inicio, fim))] na ordem das linhas
+    metadata = dict(schema.metadata or {})
+    metadata[CHAVE_HASH] = versao.encode()
+    metadata[CHAVE_ORIGEM] = json.dumps({'csv': csv_digest, 'deltas': list(digests_deltas)}).encode()
+    metadata[CHAVE_PARTICOES] = json.dumps([[nome, inicio, fim] for nome, (inicio, fim) in particoes]).encode()
+    return schema.with_metadata(metadata)
+
+def _schema_lotes(schema):
+    # Schema fixo dos arquivos temporários do build em streaming: o do primeiro lote, com os números
+    # alargados para float64 (inteiros são exatos até 2⁵³), já que um lote seguinte ou um delta
+    # pode ter inferido float onde o primeiro inferiu int
+    return pa.schema([
+        pa.field(campo.name, pa.float64()) if pa.types.is_integer(campo.type) or pa.types.is_floating(campo.type) else campo
+        for campo in schema
+    ])
+
+def _juntar_colunas(table, pasta):
+    # Record batch único com as colunas da table (mapeada, em vários batches) sem ter a table
+    # inteira no heap: cada coluna é juntada em um buffer contíguo, gravada em um arquivo da pasta
+    # e lida de volta mapeada, então o heap só segura uma coluna por vez
+    colunas = []
+    for i, campo in enumerate(table.schema):
+        schema = pa.schema([campo])
+        coluna_path = os.path.join(pasta, f'coluna{i}.arrow')
+        with pa.ipc.new_file(coluna_path, schema) as writer:
+            writer.write_batch(pa.record_batch([pa.concat_arrays(table.column(i).chunks)], schema=schema))
+        colunas.append(pa.ipc.open_file(pa.memory_map(coluna_path)).get_batch(0).column(0))
+    return pa.RecordBatch.from_arrays(colunas, schema=table.schema)
+
+def escrever_snapshot(df, path, versao, csv_digest, digests_deltas):
+    particoes = sorted(ParticoesPaises(df).limites.items(), key=lambda item: item[1])
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(_schema_snapshot(table.schema, versao, csv_digest, digests_deltas, particoes).metadata)
+
+    # Escrita atômica: sessões concorrentes nunca leem um arquivo pela metade.
+    # Sem compressão e em um único record batch, para que o arquivo possa ser mapeado em memória
+    # e cada coluna lida sem cópia (ver para_pandas); as partições ficam nos metadados.
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with pa.ipc.new_file(tmp_path, table.schema) as writer:
+        writer.write_table(table.combine_chunks())
+    os.replace(tmp_path, path)
+    return path
+
+def construir_snapshot(csv_path, csv_digest, deltas=(), tamanho_lote=TAMANHO_LOTE, progresso=None):
+    # Snapshot completo: CSV tratado + todos os deltas, em ordem, sem carregar o CSV inteiro.
+    # Cada lote tratado é separado por país em arquivos temporários (Arrow IPC); no fim os lotes de
+    # cada país são tipados, com os tipos de todos os lotes alargados, e o snapshot é gravado em
+    # um record batch, montado coluna a coluna. O pico de memória é o de um lote, ou o da maior
+    # coluna do snapshot, mais 8 bytes por linha das digitais.
+    # progresso(resumo), se passado, recebe os agregados parciais a cada lote.
+    path = caminho_snapshot(csv_path)
+    digests = [digest for _, digest in deltas]
+    novas = juntar_deltas([ler_delta(caminho) for caminho, _ in deltas]) if deltas else None
+    resumo = ResumoLotes()
+    # Valores das colunas que viram categóricas; as categorias só são conhecidas no fim
+    categorias = {}
+    spill = {}
+    schema_lotes = None
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as pasta:
+        def separar(lote):
+            nonlocal schema_lotes
+            resumo.acumular(lote)
+            for coluna in COLUNAS_CATEGORICAS:
+                if not isinstance(lote[coluna].dtype, pd.CategoricalDtype):
+                    categorias.setdefault(coluna, set()).update(lote[coluna].unique())
+            for pais, parte in lote.groupby('Country Name', observed=True, sort=False):
+                table = pa.Table.from_pandas(parte, preserve_index=False).replace_schema_metadata(None)
+                if schema_lotes is None:
+                    schema_lotes = _schema_lotes(table.schema)
+                if pais not in spill:
+                    spill[pais] = pa.ipc.new_stream(os.path.join(pasta, f'{len(spill)}.arrow'), schema_lotes)
+                spill[pais].write_table(table.cast(schema_lotes))
+
+        for lote in tratar_em_lotes(csv_path, resumo, tamanho_lote):
+            if novas is not None:
+                # Restaurantes que algum delta substitui saem aqui e entram no fim, como em aplicar_deltas
+                lote = lote[~lote[CHAVE_RESTAURANTE].isin(novas[CHAVE_RESTAURANTE])]
+            separar(lote)
+            if progresso:
+                progresso(resumo)
+        if novas is not None:
+            resumo.alargar_tipos(novas[list(resumo.tipos)].dtypes)
+            separar(novas)
+        for writer in spill.values():
+            writer.close()
+
+        # Partições na ordem em que cada país apareceu (a mesma de particionar_por_pais)
+        particoes, inicio = [], 0
+        for pais, (restaurantes, _, _) in resumo.paises.items():
+            particoes.append((pais, (inicio, inicio + restaurantes)))
+            inicio += restaurantes
+
+        # Cada lote de cada país é tipado e gravado como um record batch de um arquivo intermediário
+        paises_path = os.path.join(pasta, 'paises.arrow')
+        categorias = {coluna: sorted(valores) for coluna, valores in categorias.items()}
+        writer = None
+        for i in range(len(spill)):
+            for batch in pa.ipc.open_stream(os.path.join(pasta, f'{i}.arrow')):
+                df = batch.to_pandas()
+                # Os números voltam do float64 dos arquivos temporários para o tipo alargado de cada coluna
+                df = df.astype({coluna: tipo for coluna, tipo in resumo.tipos.items() if df[coluna].dtype != tipo})
+                df = tipar_colunas(df, categorias)
+                table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+                if writer is None:
+                    writer = pa.ipc.new_file(paises_path, table.schema)
+                writer.write_table(table)
+        writer.close()
+
+        # O snapshot é um único record batch (ver escrever_snapshot), montado coluna a coluna
+        with pa.memory_map(paises_path) as source:
+            batch = _juntar_colunas(pa.ipc.open_file(source).read_all(), pasta)
+        schema = _schema_snapshot(batch.schema, digest_versao(csv_digest, digests), csv_digest, digests, particoes)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with pa.ipc.new_file(tmp_path, schema) as writer:
+            writer.write_batch(batch)
+        del batch
+    os.replace(tmp_path, path)
+    return path
+
+def atualizar_snapshot(csv_path, csv_digest, deltas=()):
+    # deltas: [(caminho, hash)] em ordem de aplicação. Se o snapshot atual veio do mesmo CSV e
+    # de um prefixo destes deltas, aplica só os que faltam; se o CSV mudou, reconstrói do zero.
+    path = caminho_snapshot(csv_path)
+    digests = [digest for _, digest in deltas]
+    versao = digest_versao(csv_digest, digests)
+    metadata = metadados_snapshot(path)
+    if metadata.get(CHAVE_HASH, b'').decode() == versao:
+        return path
+
+    origem = json.loads(metadata.get(CHAVE_ORIGEM, b'null'))
+    aplicados = origem['deltas'] if origem and origem['csv'] == csv_digest else None
+    if aplicados is None or digests[:len(aplicados)] != aplicados:
+        return construir_snapshot(csv_path, csv_digest, deltas)
+
+    df = para_pandas(feather.read_table(path))
+    novo, removidas, adicionadas = aplicar_deltas(df, [ler_delta(caminho) for caminho, _ in deltas[len(aplicados):]])
+    escrever_snapshot(novo, path, versao, csv_digest, digests)
+    # Os agregados desta versão podem partir dos da anterior, mesmo em outro processo (ver utils.data)
+    registrar_atualizacao(csv_path, versao, metadata[CHAVE_HASH].decode(), removidas, adicionadas)
+    return path
+
+def carregar_snapshot(csv_path, csv_digest, deltas=()):
+    table = feather.read_table(atualizar_snapshot(csv_path, csv_digest, deltas), memory_map=True)
+    return para_pandas(table)
+
+#============================================================
+# Build
+#============================================================
+
+if __name__ == '__main__':
+    from utils.data import DATASET_PATH, assinatura_arquivo, deltas_dados
+
+    parser = argparse.ArgumentParser(description='Gera o snapshot colunar do dataset tratado.')
+    parser.add_argument('csv', nargs='?', default=DATASET_PATH)
+    parser.add_argument('--force', action='store_true', help='reconstrói mesmo se estiver atualizado')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='linhas por lote na leitura do CSV')
+    args = parser.parse_args()
+
+    # Agregados parciais a cada lote; os por país do último lote saem em tabela no fim
+    resumos = []
+
+    def progresso(resumo):
+        tabela = resumo.tabela()
+        media = (tabela['Mean Rating'] * tabela['Restaurants']).sum() / max(resumo.restaurantes, 1)
+        print(f'lote {resumo.lotes}: {resumo.lidas} linhas lidas, {resumo.nulas} com nulos, '
+              f'{resumo.desconhecidas} de países desconhecidos, {resumo.duplicadas} duplicadas, '
+              f'{resumo.restaurantes} restaurantes em {len(resumo.paises)} países, '
+              f'{tabela["Votes"].sum()} votos, nota média {media:.2f}')
+        resumos[:] = [resumo]
+
+    _, csv_digest = assinatura_arquivo(args.csv)
+    deltas = deltas_dados(args.csv)
+    if args.force:
+        print(f'Snapshot gerado em {construir_snapshot(args.csv, csv_digest, deltas, args.lote, progresso)}')
+        print(resumos[0].tabela().round(2).to_string())
+    elif hash_snapshot(caminho_snapshot(args.csv)) != digest_versao(csv_digest, [digest for _, digest in deltas]):
+        print(f'Snapshot gerado em {atualizar_snapshot(args.csv, csv_digest, deltas)}')
+    else:
+        print(f'Snapshot já está atualizado: {caminho_snapshot(args.csv)}')